@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-from app.cognito.api.routes import login
+from app.cognito.api.routes import admin, jwks, login
 
 login_router = APIRouter()
 login_router.include_router(login.router)
+login_router.include_router(jwks.router)
+login_router.include_router(admin.router)
@@ -0,0 +1,52 @@
+import hmac
+import json
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.settings import settings
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Uploads larger than this go to a temp file instead of memory
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+def require_admin(request: Request) -> None:
+    """Bearer `admin_token`; the admin API does not exist while no token is configured."""
+    if settings.admin_token is None:
+        raise HTTPException(status_code=404)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    expected = settings.admin_token.get_secret_value()
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.post("/invites", dependencies=[Depends(require_admin)])
+async def bulk_invites(request: Request) -> StreamingResponse:
+    """
+    Send magic-link invites to every recipient in the body: CSV (`text/csv`) or
+    JSON lines (`application/x-ndjson`). Streams NDJSON results as batches finish.
+    """
+    from app.cognito.invites import InviteSender, iterate, parse_recipients
+
+    content_type = request.headers.get("content-type", "")
+    fmt = "jsonl" if "json" in content_type else "csv"
+    # The body is spooled (to disk past 1 MB) so it can be read back line by line
+    # while the response streams
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+    lines = (line.decode("utf-8-sig").rstrip("\r\n") for line in body)
+    sender = InviteSender(str(request.base_url))
+
+    async def results():
+        try:
+            async for item in sender.run(parse_recipients(iterate(lines), fmt)):
+                yield json.dumps(item) + "\n"
+        finally:
+            body.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
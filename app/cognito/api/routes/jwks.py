@@ -0,0 +1,29 @@
+import hashlib
+import json
+
+from fastapi import APIRouter, Request, Response
+
+from app.cognito.token import engine
+from app.settings import settings
+
+router = APIRouter(tags=["keys"])
+
+_document: tuple[bytes, str] | None = None
+
+
+def jwks_document() -> tuple[bytes, str]:
+    """The serialized key set and its ETag; keys only change on restart, so built once."""
+    global _document
+    if _document is None:
+        body = json.dumps(engine.backend.jwks(), separators=(",", ":")).encode()
+        _document = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+    return _document
+
+
+@router.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks(request: Request) -> Response:
+    body, etag = jwks_document()
+    headers = {"Cache-Control": settings.jwks_cache_control, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/jwk-set+json", headers=headers)
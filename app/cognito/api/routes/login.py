@@ -1,17 +1,48 @@
+import asyncio
+import logging
+import time
 from typing import Annotated
 
 from fastapi import APIRouter, BackgroundTasks, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, Response
-from fastapi.templating import Jinja2Templates
 from pydantic import EmailStr
 
-import app.cognito.mails as mails
-from app.cognito.token import create_access_token, decode_token
-from config import MAIL_SEND_MESSAGE, USERS
+from app.cognito.audit import audit_log
+from app.cognito.authz import principals
+from app.cognito.lockout import lockouts
+from app.cognito.passwords import password_hasher
+from app.cognito.ratelimit import client_ip, rate_limits
+from app.cognito.revocation import consume_token
+from app.cognito.token import decode_token
+from app.cognito.users import user_repository
+from app.cognito.utils import logout_user, set_login_cookie
+from app.settings import settings
+from app.templating import PrerenderedPage, partials, templates
+from config import MAIL_SEND_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+
+def _mails():
+    # The mail stack (templates, SMTP client) loads on the first send, not at import
+    from app.cognito import mails
+
+    return mails
+
 
 router = APIRouter(tags=["login"])
 
-templates = Jinja2Templates(directory="templates")
+# The login page without error or reset state is identical for every anonymous visitor
+login_page = PrerenderedPage(
+    "login.html",
+    {"error": None, "reset_token": None, "reset_email": None},
+    cache_control=settings.login_page_cache_control,
+)
+
+
+def htmx_snippet(message: str, ok: bool = False) -> str:
+    cls = "ok" if ok else "error"
+    return f'<div id="response-container" class="{cls}">{message}</div>'
 
 
 def htmx_message(message: str, ok: bool = False) -> HTMLResponse:
@@ -19,14 +50,45 @@ def htmx_message(message: str, ok: bool = False) -> HTMLResponse:
     Returns a small snippet for HTMX swaps into #response-container.
     Always 200 so HTMX swaps the content without navigating away.
     """
-    cls = "ok" if ok else "error"
-    html = f'<div id="response-container" class="{cls}">{message}</div>'
-    return HTMLResponse(html, status_code=200)
+    return HTMLResponse(htmx_snippet(message, ok), status_code=200)
+
+
+# Constant responses, encoded once at startup
+MAIL_SENT = partials.html("mail_sent", htmx_snippet(MAIL_SEND_MESSAGE))
+TOO_MANY_ATTEMPTS = partials.template(
+    "too_many_attempts",
+    "partials/error_message.html",
+    message="Too many attempts. Please try again later.",
+)
+INVALID_CREDENTIALS = partials.template(
+    "invalid_credentials", "partials/error_message.html", message="Invalid email or password."
+)
+PASSWORD_MISMATCH = partials.template(
+    "password_mismatch", "partials/error_message.html", message="Passwords do not match."
+)
+INVALID_RESET_TOKEN = partials.template(
+    "invalid_reset_token", "partials/error_message.html", message="Invalid or expired reset token."
+)
+
+
+async def _mail_sent(started: float) -> Response:
+    """
+    The single answer of the anti-enumeration endpoints, held back until
+    `enumeration_floor_seconds` after `started` so that found, not found and
+    rate-limited requests cannot be told apart by their timing.
+    """
+    remaining = settings.enumeration_floor_seconds - (time.perf_counter() - started)
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+    return partials.response(MAIL_SENT)
 
 
 @router.get("/", response_class=HTMLResponse)
 async def read_root(request: Request, error: str | None = None, reset_token: str | None = None):
     """Welcome page for unauthorized user"""
+    if error != "invalid_token" and not reset_token:
+        return login_page.response(request)
+
     error_message = None
     if error == "invalid_token":
         error_message = "Magic link is invalid or has expired."
@@ -37,6 +99,7 @@ async def read_root(request: Request, error: str | None = None, reset_token: str
         if success:
             reset_email = email
         else:
+            audit_log.record("reset_link_rejected", ip=client_ip(request))
             error_message = "Password reset link is invalid or has expired."
             reset_token = None
 
@@ -55,16 +118,31 @@ async def login_password(
     username: Annotated[EmailStr, Form(...)],  # required, validated
     password: Annotated[str, Form(...)],  # required
 ):
-    user = USERS.get(username)
-    if not user or user["password"] != password:
-        return templates.TemplateResponse(
-            "partials/error_message.html",
-            {"request": request, "message": "Invalid email or password."},
+    ip = client_ip(request)
+    # Locked accounts/IPs are turned away before any lookup or password work
+    retry_after = lockouts.retry_after(username, ip) or await rate_limits.check(
+        "login", ip=ip, email=username
+    )
+    if retry_after:
+        audit_log.record("login_throttled", username, ip)
+        return partials.response(
+            TOO_MANY_ATTEMPTS, headers={"Retry-After": str(int(retry_after) + 1)}
         )
 
-    access_token = create_access_token(data={"sub": username})
+    user = await user_repository.get_by_email(username)
+    valid, rehash = await password_hasher.verify(password, user["password"] if user else None)
+    if not valid:
+        lockouts.failed(username, ip)
+        audit_log.record("login_failed", username, ip)
+        return partials.response(INVALID_CREDENTIALS)
+    if rehash:
+        await user_repository.update_password(username, await password_hasher.hash(password))
+
+    lockouts.succeeded(username)
+    audit_log.record("login_succeeded", username, ip)
+    logger.info("login succeeded", extra={"event": "login_succeeded", "email": username})
     response = Response()
-    response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
+    await set_login_cookie(response, username)
     response.headers["HX-Redirect"] = "/welcome"
     return response
 
@@ -74,45 +152,61 @@ async def forgot_password(
     request: Request,
     background: BackgroundTasks,
 ):
+    started = time.perf_counter()
     # Robustly accept both 'email' and 'username' fields
     form = await request.form()
     email_value = (form.get("email") or form.get("username") or "").strip()
+    # Over budget: skip all lookup and mail work but answer exactly the same
+    ip = client_ip(request)
+    if await rate_limits.check("forgot", ip=ip, email=email_value):
+        audit_log.record("reset_link_throttled", email_value, ip)
+        return await _mail_sent(started)
     try:
-        if USERS.get(email_value):
+        if await user_repository.get_by_email(email_value):
+            audit_log.record("reset_link_issued", email_value, ip)
             # Send email in the background if user exists (use your mailer)
-            background.add_task(mails.send_password_reset_email, str(email_value), request)
+            background.add_task(_mails().send_password_reset_email, str(email_value), request)
     except Exception:
         # Intentionally ignore to avoid leaking information
         pass
 
     # Return the same message regardless of existence
     # Always respond the same to avoid user enumeration
-    return htmx_message(MAIL_SEND_MESSAGE)
+    return await _mail_sent(started)
 
 
 @router.post("/magic-login", response_class=HTMLResponse)
 async def login_magic_link(
     request: Request, background: BackgroundTasks, username: Annotated[EmailStr, Form(...)]
 ):
-    user = USERS.get(username)
+    started = time.perf_counter()
+    ip = client_ip(request)
+    if await rate_limits.check("magic", ip=ip, email=username):
+        audit_log.record("magic_link_throttled", username, ip)
+        return await _mail_sent(started)
+
+    user = await user_repository.get_by_email(username)
     # if not user: return htmx_message("Email not found.")
 
     if user:
+        audit_log.record("magic_link_issued", username, ip)
         # Send the email (in background so the response is snappy)
-        background.add_task(mails.send_magic_link_email, str(username), request)
+        background.add_task(_mails().send_magic_link_email, str(username), request)
 
-    return htmx_message(MAIL_SEND_MESSAGE)
+    return await _mail_sent(started)
 
 
 @router.get("/magic-link-verify")
 async def verify_magic_link(request: Request, token: str):
-    success, email = decode_token(token)
+    # Only magic-link tokens: not reset tokens and not the access token cookie
+    success, email = await consume_token(token, expected_purpose="magic_link")
     if not success:
+        audit_log.record("magic_link_rejected", ip=client_ip(request))
         return RedirectResponse(url="/?error=invalid_token")
+    audit_log.record("magic_link_verified", email, client_ip(request))
 
-    access_token = create_access_token(data={"sub": email})
     response = RedirectResponse(url="/welcome")
-    response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
+    await set_login_cookie(response, email)
     return response
 
 
@@ -121,6 +215,7 @@ async def reset_password_form(request: Request, token: str):
     """Redirect to login page with reset token for password reset flow."""
     success, email = decode_token(token, expected_purpose="password_reset")
     if not success:
+        audit_log.record("reset_link_rejected", ip=client_ip(request))
         return RedirectResponse(url="/?error=invalid_token")
 
     return RedirectResponse(url=f"/?reset_token={token}")
@@ -135,21 +230,19 @@ async def reset_password(
 ):
     """Process password reset with token validation."""
     if new_password != confirm_password:
-        return templates.TemplateResponse(
-            "partials/error_message.html",
-            {"request": request, "message": "Passwords do not match."},
-        )
+        return partials.response(PASSWORD_MISMATCH)
 
-    success, email = decode_token(token, expected_purpose="password_reset")
+    success, email = await consume_token(token, expected_purpose="password_reset")
     if not success:
-        return templates.TemplateResponse(
-            "partials/error_message.html",
-            {"request": request, "message": "Invalid or expired reset token."},
-        )
+        audit_log.record("reset_link_rejected", ip=client_ip(request))
+        return partials.response(INVALID_RESET_TOKEN)
 
-    # Update password in USERS dict
-    if email in USERS:
-        USERS[email]["password"] = new_password
+    # New version: tokens issued before the reset stop working
+    await user_repository.update_password(
+        email, await password_hasher.hash(new_password), invalidate_tokens=True
+    )
+    principals.invalidate(email)
+    audit_log.record("password_reset", email, client_ip(request))
 
     # Return success response that triggers card flip back to login with prefilled data
     response = templates.TemplateResponse(
@@ -169,8 +262,9 @@ async def reset_password(
 
 
 @router.post("/logout")
-async def logout():
-    """Clear the auth cookie and redirect to root."""
+async def logout(request: Request):
+    """Revoke the session, clear the auth cookies and redirect to root."""
     response = RedirectResponse(url="/", status_code=303)
-    response.delete_cookie("access_token")
+    user = await logout_user(request, response)
+    audit_log.record("logout", user, client_ip(request))
     return response
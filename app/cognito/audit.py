@@ -0,0 +1,287 @@
+"""
+Append-only audit log of authentication events.
+
+`record` only appends a tuple to an in-memory ring buffer; a background task
+per event loop writes the buffer out in batches (in a worker thread) every
+`flush_interval` seconds, or sooner once `batch_size` events are waiting. If
+the sink falls behind, the oldest buffered events are overwritten and
+counted as dropped, so the request path never waits on disk.
+
+Per-hour rollups, e.g. failed logins per IP or links issued per user:
+
+    uv run python -m app.cognito.audit login_failed --by ip --hours 24
+    uv run python -m app.cognito.audit magic_link_issued reset_link_issued --by email
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Protocol
+
+from app.cognito.loops import LoopBinding
+from app.cognito.sqlite import SQLitePool
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (timestamp, event, email, ip, detail)
+Event = tuple[float, str, str | None, str | None, dict | None]
+# (hour as "YYYY-MM-DDTHH:00Z", email or ip, count)
+Rollup = list[tuple[str, str, int]]
+
+GROUP_BY = ("email", "ip")
+
+
+def hour_of(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:00Z", time.gmtime(ts))
+
+
+def _rollup(
+    events: Iterable[Event], names: Iterable[str], by: str, since: float, until: float
+) -> Rollup:
+    names = set(names)
+    column = 2 if by == "email" else 3
+    counts = Counter(
+        (hour_of(event[0]), event[column] or "")
+        for event in events
+        if event[1] in names and since <= event[0] < until
+    )
+    return sorted((hour, key, count) for (hour, key), count in counts.items())
+
+
+class AuditSink(Protocol):
+    def write(self, events: list[Event]) -> None: ...
+
+    def rollup(self, names: Iterable[str], by: str, since: float, until: float) -> Rollup: ...
+
+
+class MemoryAuditSink:
+    """Keeps the last `maxsize` written events; for development and tests."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.events: deque[Event] = deque(maxlen=maxsize)
+
+    def write(self, events: list[Event]) -> None:
+        self.events.extend(events)
+
+    def rollup(self, names: Iterable[str], by: str, since: float, until: float) -> Rollup:
+        return _rollup(list(self.events), names, by, since, until)
+
+
+class FileAuditSink:
+    """One JSON object per line, appended; rollups scan the whole file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def write(self, events: list[Event]) -> None:
+        lines = [
+            json.dumps(
+                {"ts": ts, "event": name, "email": email, "ip": ip, "detail": detail},
+                separators=(",", ":"),
+            )
+            + "\n"
+            for ts, name, email, ip, detail in events
+        ]
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.writelines(lines)
+
+    def _read(self) -> Iterable[Event]:
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                yield row["ts"], row["event"], row["email"], row["ip"], row["detail"]
+
+    def rollup(self, names: Iterable[str], by: str, since: float, until: float) -> Rollup:
+        return _rollup(self._read(), names, by, since, until)
+
+
+class SQLiteAuditSink:
+    """Events in one insert-only table, indexed by (event, ts) for rollups."""
+
+    def __init__(self, path: str, pool_size: int = 2):
+        self.pool = SQLitePool(path, size=pool_size)
+        with self.pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audit_events ("
+                " ts REAL NOT NULL, event TEXT NOT NULL,"
+                " email TEXT, ip TEXT, detail TEXT"
+                ")"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS audit_events_event ON audit_events (event, ts)"
+            )
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, events: list[Event]) -> None:
+        rows = [
+            (ts, name, email, ip, json.dumps(detail) if detail else None)
+            for ts, name, email, ip, detail in events
+        ]
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO audit_events (ts, event, email, ip, detail) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _rollup(
+        conn: sqlite3.Connection, names: list[str], by: str, since: float, until: float
+    ) -> Rollup:
+        placeholders = ",".join("?" * len(names))
+        # `by` is one of GROUP_BY, checked by the caller
+        rows = conn.execute(
+            "SELECT strftime('%Y-%m-%dT%H:00Z', ts, 'unixepoch') AS hour,"
+            f" coalesce({by}, '') AS key, count(*) FROM audit_events"
+            f" WHERE event IN ({placeholders}) AND ts >= ? AND ts < ?"
+            " GROUP BY hour, key ORDER BY hour, key",
+            (*names, since, until),
+        )
+        return [tuple(row) for row in rows]
+
+    def write(self, events: list[Event]) -> None:
+        self.pool.call(self._write, events)
+
+    def rollup(self, names: Iterable[str], by: str, since: float, until: float) -> Rollup:
+        return self.pool.call(self._rollup, list(names), by, since, until)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def make_audit_sink(url: str = settings.audit_store) -> AuditSink:
+    """
+    `memory`, `file:///abs/path/audit.jsonl` or `sqlite:///audit.db`. File URLs
+    follow RFC 8089, so the path after `file://` is absolute; sqlite URLs follow
+    SQLAlchemy, relative after three slashes and absolute after four.
+    """
+    if url == "memory":
+        return MemoryAuditSink()
+    if url.startswith("file:///"):
+        return FileAuditSink(url.removeprefix("file://"))
+    if url.startswith("sqlite:///"):
+        return SQLiteAuditSink(url.removeprefix("sqlite:///"))
+    raise ValueError(f"Unsupported audit store: {url}")
+
+
+class AuditLog:
+    def __init__(
+        self,
+        sink: AuditSink,
+        buffer_size: int = settings.audit_buffer_size,
+        batch_size: int = settings.audit_batch_size,
+        flush_interval: float = settings.audit_flush_interval,
+        enabled: bool = settings.audit_enabled,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.clock = clock
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._buffer: deque[Event] = deque(maxlen=buffer_size)
+        self._binding = LoopBinding()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, event: str, email: str | None = None, ip: str | None = None, **detail) -> None:
+        """Buffers one event; never blocks."""
+        if not self.enabled:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((self.clock(), event, email, ip, detail or None))
+        wake = self._ensure_started()
+        if wake is not None and len(self._buffer) >= self.batch_size:
+            wake.set()
+
+    def _ensure_started(self) -> asyncio.Event | None:
+        try:
+            rebound = self._binding.rebind()
+        except RuntimeError:
+            return None  # recorded outside a loop; written on the next flush
+        if rebound:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._flusher())
+        return self._wake
+
+    async def _flusher(self) -> None:
+        wake = self._wake
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Writes everything buffered so far, `batch_size` events per write."""
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await asyncio.to_thread(self.sink.write, batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("writing %d audit events failed", len(batch))
+            else:
+                self.written += len(batch)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._binding.reset()
+        await self.flush()
+
+    async def rollup(
+        self, *names: str, by: str = "ip", hours: float = 24, until: float | None = None
+    ) -> Rollup:
+        """Per-hour counts of `names` events grouped by email or ip, newest `hours` only."""
+        if by not in GROUP_BY:
+            raise ValueError(f"Can only group by {GROUP_BY}, not {by!r}")
+        await self.flush()
+        until = self.clock() if until is None else until
+        return await asyncio.to_thread(self.sink.rollup, names, by, until - hours * 3600, until)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+audit_log = AuditLog(make_audit_sink())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cognito.audit")
+    parser.add_argument("events", nargs="+", help="event names, e.g. login_failed")
+    parser.add_argument("--by", choices=GROUP_BY, default="ip")
+    parser.add_argument("--hours", type=float, default=24, help="how far back to look")
+    parser.add_argument("--store", default=settings.audit_store, help="file:/// or sqlite:///")
+    args = parser.parse_args(argv)
+
+    log = AuditLog(make_audit_sink(args.store))
+    for hour, key, count in asyncio.run(log.rollup(*args.events, by=args.by, hours=args.hours)):
+        print(f"{hour}\t{key}\t{count}")
+
+
+if __name__ == "__main__":
+    main()
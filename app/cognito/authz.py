@@ -0,0 +1,59 @@
+import time
+
+from app.cognito.cache import TTLCache
+from app.cognito.users import UserRepository, user_repository
+from app.settings import settings
+
+
+def principal_of(user: dict) -> dict:
+    """What authorization needs from a user record, with the roles its role grants."""
+    role = user["role"]
+    return {
+        "email": user["email"],
+        "tenant": user["tenant"],
+        "role": role,
+        "version": user["version"],
+        "roles": frozenset(settings.role_grants.get(role, [role])),
+    }
+
+
+class PrincipalCache:
+    """
+    Tenant, role and token version per user, read through from the user store
+    and kept for `ttl` seconds in a bounded LRU, so authorizing a request does
+    not hit the store. `invalidate` drops a user right away (password reset);
+    other workers pick the change up once their copy expires.
+    """
+
+    def __init__(
+        self,
+        users: UserRepository,
+        ttl: float = settings.authz_cache_ttl_seconds,
+        maxsize: int = settings.authz_cache_size,
+    ):
+        self.users = users
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize)
+
+    async def get(self, email: str) -> dict | None:
+        """The principal for `email`, or None if there is no such user."""
+        principal = self._cache.get(email)
+        if principal is None:
+            user = await self.users.get_by_email(email)
+            if user is None:
+                return None
+            principal = principal_of(user)
+            self._cache.set(email, principal, expires_at=time.time() + self.ttl)
+        return principal
+
+    def invalidate(self, email: str) -> None:
+        self._cache.pop(email)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, float]:
+        return self._cache.stats()
+
+
+principals = PrincipalCache(user_repository)
@@ -0,0 +1,198 @@
+"""
+Bulk magic-link invites.
+
+Recipients are read as a stream (CSV with an `email` column or as the first
+column, or JSON lines with an `email` key), so only `batch_size *
+concurrency` of them are in memory at any time. Each batch is signed, rendered
+from the compiled template and sent over one SMTP session from a dedicated
+pool, with at most `concurrency` batches in flight. Results come back as they
+finish, one dict per recipient. Only existing users get a link; other
+addresses are reported as `unknown_user`, since their link could not log
+anyone in.
+
+    uv run python -m app.cognito.invites recipients.csv --base-url https://app.example.com
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from datetime import timedelta
+
+from email_validator import EmailNotValidError, validate_email
+
+from app.cognito import mails
+from app.cognito.smtp import SMTPPool
+from app.cognito.token import engine
+from app.cognito.users import UserRepository, user_repository
+from app.settings import settings
+
+
+async def iterate(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Async view of a blocking line iterator (file, upload), one line at a time."""
+    for line in lines:
+        yield line
+
+
+async def parse_recipients(lines: AsyncIterable[str], fmt: str = "csv") -> AsyncIterator[str]:
+    """Email addresses from CSV or JSONL lines, one at a time."""
+    column = 0
+    first = True
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "jsonl":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line.strip()  # reported as invalid downstream
+                continue
+            yield str(record.get("email", "")) if isinstance(record, dict) else ""
+            continue
+        row = next(csv.reader([line]))
+        if first:
+            first = False
+            header = [cell.strip().lower() for cell in row]
+            if "email" in header:
+                column = header.index("email")
+                continue
+        yield row[column].strip() if column < len(row) else ""
+
+
+class InviteSender:
+    def __init__(
+        self,
+        base_url: str,
+        batch_size: int = settings.invite_batch_size,
+        concurrency: int = settings.invite_concurrency,
+        pool: SMTPPool | None = None,
+        users: UserRepository = user_repository,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.users = users
+        # Own connections, so a large job does not starve regular login mail
+        self.pool = pool or SMTPPool(
+            settings.smtp_host,
+            settings.smtp_port,
+            size=concurrency,
+            timeout=settings.smtp_timeout,
+            **settings.smtp_options,
+        )
+        self.template = mails.email_templates.get_template("invite_email.html")
+        self.lifetime = timedelta(hours=settings.invite_token_expire_hours)
+
+    def _message(self, email: str):
+        token = engine.issue({"sub": email, "purpose": "magic_link"}, expires_delta=self.lifetime)
+        link = f"{self.base_url}/magic-link-verify?token={token}"
+        html = self.template.render(
+            project_name=settings.project_name,
+            username=email,
+            email=email,
+            link=link,
+            valid_hours=settings.invite_token_expire_hours,
+        )
+        subject = f"{settings.project_name} - You're invited"
+        return mails.build_message(email=email, subject=subject, html_content=html)
+
+    async def _send_batch(self, emails: list[str]) -> list[dict]:
+        results: list[dict] = []
+        messages = []
+        for email in emails:
+            try:
+                email = validate_email(email, check_deliverability=False).normalized
+            except EmailNotValidError as err:
+                results.append({"email": email, "status": "invalid", "error": str(err)})
+                continue
+            if await self.users.get_by_email(email) is None:
+                results.append({"email": email, "status": "unknown_user"})
+                continue
+            messages.append((email, self._message(email)))
+
+        pending = list(reversed(messages))
+        if not pending:
+            return results
+        try:
+            async with self.pool.connection() as client:
+                while pending:
+                    email, message = pending[-1]
+                    await client.send_message(message)
+                    pending.pop()
+                    results.append({"email": email, "status": "sent"})
+        except Exception:
+            # Retry what is left one by one so a bad address does not fail the batch
+            for email, message in reversed(pending):
+                try:
+                    await self.pool.send(message)
+                except Exception as err:
+                    results.append({"email": email, "status": "failed", "error": str(err)})
+                else:
+                    results.append({"email": email, "status": "sent"})
+        return results
+
+    async def run(self, recipients: AsyncIterable[str]) -> AsyncIterator[dict]:
+        """Per-recipient results as batches complete, then a summary."""
+        counts = {"sent": 0, "failed": 0, "invalid": 0, "unknown_user": 0}
+        start = time.perf_counter()
+        in_flight: set[asyncio.Task] = set()
+
+        async def finished(wait_for_all: bool) -> AsyncIterator[dict]:
+            nonlocal in_flight
+            mode = asyncio.ALL_COMPLETED if wait_for_all else asyncio.FIRST_COMPLETED
+            done, in_flight = await asyncio.wait(in_flight, return_when=mode)
+            for task in done:
+                for result in task.result():
+                    counts[result["status"]] += 1
+                    yield result
+            yield {"progress": sum(counts.values()), **counts}
+
+        batch: list[str] = []
+        try:
+            async for email in recipients:
+                batch.append(email)
+                if len(batch) < self.batch_size:
+                    continue
+                if len(in_flight) >= self.concurrency:
+                    async for item in finished(wait_for_all=False):
+                        yield item
+                in_flight.add(asyncio.create_task(self._send_batch(batch)))
+                batch = []
+            if batch:
+                in_flight.add(asyncio.create_task(self._send_batch(batch)))
+            if in_flight:
+                async for item in finished(wait_for_all=True):
+                    yield item
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await self.pool.close()
+        yield {"summary": {**counts, "seconds": round(time.perf_counter() - start, 3)}}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cognito.invites")
+    parser.add_argument("file", help="CSV or JSONL file of recipients, '-' for stdin")
+    parser.add_argument("--base-url", required=True, help="public URL the links point to")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--batch-size", type=int, default=settings.invite_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.invite_concurrency)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("jsonl" if args.file.endswith((".jsonl", ".ndjson")) else "csv")
+
+    async def run() -> None:
+        sender = InviteSender(args.base_url, args.batch_size, args.concurrency)
+        with sys.stdin if args.file == "-" else open(args.file, newline="") as fh:
+            recipients = parse_recipients(iterate(line.rstrip("\r\n") for line in fh), fmt)
+            async for item in sender.run(recipients):
+                stream = sys.stderr if "progress" in item else sys.stdout
+                print(json.dumps(item), file=stream, flush=True)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
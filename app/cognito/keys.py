@@ -0,0 +1,84 @@
+"""
+Token signing keys, indexed by key id (`kid`).
+
+The active key signs new tokens; it and up to N previous keys verify. Tokens
+carry their `kid` in the header, so verification is one dict lookup no matter
+how many old keys are kept. Rotate with:
+
+    uv run python -m app.cognito.keys rotate [--file keys.json] [--keep 2]
+
+Workers load the keyring at startup, so rotate first and then restart them
+(SIGHUP on `python -m app.server`). Tokens signed with a key that has been
+dropped from the ring stop verifying.
+"""
+
+import argparse
+import json
+import os
+import secrets
+from pathlib import Path
+
+from app.settings import settings
+
+# Tokens issued before key ids existed have no `kid`; they map to this one
+LEGACY_KID = "default"
+
+
+class Keyring:
+    """Secrets by kid; `active` names the one used for signing."""
+
+    def __init__(self, keys: dict[str, str], active: str):
+        if active not in keys:
+            raise ValueError(f"Active key {active!r} is not in the keyring")
+        self.keys = keys
+        self.active = active
+
+    @classmethod
+    def single(cls, secret: str, kid: str = LEGACY_KID) -> "Keyring":
+        return cls({kid: secret}, kid)
+
+    def rotate(self, keep: int = settings.token_keys_retained) -> "Keyring":
+        """New ring with a fresh active key plus the `keep` most recent previous keys."""
+        kid = secrets.token_hex(4)
+        previous = [self.active] + [k for k in self.keys if k != self.active]
+        keys = {k: self.keys[k] for k in previous[:keep]}
+        return Keyring({kid: secrets.token_urlsafe(32), **keys}, kid)
+
+    def to_dict(self) -> dict:
+        return {"active": self.active, "keys": self.keys}
+
+
+def load_keyring(path: str | None = settings.token_keyring_file) -> Keyring:
+    """The keyring stored at `path`, or a single key from `secret_key` when there is none."""
+    if path and Path(path).exists():
+        data = json.loads(Path(path).read_text())
+        return Keyring(data["keys"], data["active"])
+    return Keyring.single(settings.secret_key.get_secret_value())
+
+
+def save_keyring(keyring: Keyring, path: str) -> None:
+    # Write to a private temp file and swap it in, so readers never see half a ring
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as fh:
+        json.dump(keyring.to_dict(), fh, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cognito.keys")
+    parser.add_argument("command", choices=["rotate", "show"])
+    parser.add_argument("--file", default=settings.token_keyring_file or "keys.json")
+    parser.add_argument("--keep", type=int, default=settings.token_keys_retained)
+    args = parser.parse_args(argv)
+
+    keyring = load_keyring(args.file)
+    if args.command == "rotate":
+        keyring = keyring.rotate(keep=args.keep)
+        save_keyring(keyring, args.file)
+    for kid in keyring.keys:
+        print(f"{kid}{' (active)' if kid == keyring.active else ''}")
+
+
+if __name__ == "__main__":
+    main()
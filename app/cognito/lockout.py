@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from app.settings import settings
+
+
+class FailureRecord:
+    __slots__ = ("count", "last")
+
+    def __init__(self, count: int, last: float):
+        self.count = count
+        self.last = last
+
+
+class FailureTracker:
+    """
+    Failed attempts per key with exponential backoff: from `threshold` failures
+    on, the key is locked for `base_delay * 2**(failures - threshold)` seconds
+    (capped at `max_delay`) after its last failure. The count halves every
+    `half_life` seconds without failures, so old mistakes fade on their own.
+
+    Keys are stored as 8-byte digests in an LRU of at most `max_keys` records,
+    so memory stays bounded when an attack sprays millions of random emails;
+    the least recently failed keys are forgotten first.
+    """
+
+    def __init__(
+        self,
+        threshold: int = settings.lockout_threshold,
+        base_delay: float = settings.lockout_base_seconds,
+        max_delay: float = settings.lockout_max_seconds,
+        half_life: float = settings.lockout_half_life_seconds,
+        max_keys: int = settings.lockout_max_keys,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self.clock = clock
+        self._records: OrderedDict[bytes, FailureRecord] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+    def _decayed(self, record: FailureRecord, now: float) -> int:
+        return record.count >> int((now - record.last) // self.half_life)
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until `key` may try again; 0 when it is not locked."""
+        with self._lock:
+            record = self._records.get(self._digest(key))
+            if record is None:
+                return 0.0
+            now = self.clock()
+            failures = self._decayed(record, now)
+            if failures < self.threshold:
+                return 0.0
+            delay = min(self.max_delay, self.base_delay * 2 ** (failures - self.threshold))
+            return max(0.0, record.last + delay - now)
+
+    def fail(self, key: str) -> None:
+        digest = self._digest(key)
+        with self._lock:
+            now = self.clock()
+            record = self._records.get(digest)
+            if record is None:
+                if len(self._records) >= self.max_keys:
+                    self._records.popitem(last=False)
+                self._records[digest] = FailureRecord(1, now)
+                return
+            record.count = self._decayed(record, now) + 1
+            record.last = now
+            self._records.move_to_end(digest)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(self._digest(key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class LoginLockout:
+    """Failure tracking for /login, per account and per client IP."""
+
+    def __init__(
+        self,
+        accounts: FailureTracker,
+        ips: FailureTracker,
+        enabled: bool = settings.lockout_enabled,
+    ):
+        self.accounts = accounts
+        self.ips = ips
+        self.enabled = enabled
+
+    def retry_after(self, email: str, ip: str) -> float:
+        if not self.enabled:
+            return 0.0
+        return max(self.accounts.retry_after(email.lower()), self.ips.retry_after(ip))
+
+    def failed(self, email: str, ip: str) -> None:
+        if self.enabled:
+            self.accounts.fail(email.lower())
+            self.ips.fail(ip)
+
+    def succeeded(self, email: str) -> None:
+        self.accounts.forget(email.lower())
+
+    def reset(self) -> None:
+        self.accounts.clear()
+        self.ips.clear()
+
+
+# An IP may legitimately carry many users (NAT), so it gets a higher threshold
+lockouts = LoginLockout(
+    FailureTracker(),
+    FailureTracker(threshold=settings.lockout_threshold * settings.lockout_ip_factor),
+)
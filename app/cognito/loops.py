@@ -0,0 +1,32 @@
+import asyncio
+
+
+class LoopBinding:
+    """
+    Tracks which event loop some asyncio state (semaphores, queues, open
+    connections, background tasks) was created on. That state is only usable
+    on its own loop, and a process can run several loops one after another
+    (each `asyncio.run`, a loop per worker thread), so owners rebuild it when
+    `rebind` reports a different running loop.
+    """
+
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    def rebind(self) -> bool:
+        """Binds to the running loop; True if that is a different loop than before."""
+        loop = asyncio.get_running_loop()
+        if loop is self.loop:
+            return False
+        self.loop = loop
+        return True
+
+    def is_current(self) -> bool:
+        """Whether the state belongs to the running loop (False outside any loop)."""
+        try:
+            return self.loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def reset(self) -> None:
+        self.loop = None
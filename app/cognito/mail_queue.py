@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import EmailMessage
+
+from app.cognito.loops import LoopBinding
+from app.cognito.smtp import SMTPPool
+from app.metrics import timer
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """
+    Bounded in-process queue for outbound mail, drained by a fixed number of
+    worker coroutines. A worker takes everything that is waiting (up to
+    `batch_size` messages) and sends it over a single pooled SMTP session.
+
+    When the queue is full, `put` waits up to `put_timeout` seconds for room
+    (backpressure) and then drops the message (load shedding).
+    """
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        maxsize: int = 1000,
+        workers: int = 2,
+        batch_size: int = 20,
+        put_timeout: float = 0.0,
+    ):
+        self.pool = pool
+        self.maxsize = maxsize
+        self.workers = workers
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._binding = LoopBinding()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._binding.rebind():
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self._queue
+
+    async def put(self, message: EmailMessage) -> bool:
+        """Queue a message; returns False if it had to be dropped."""
+        queue = self._ensure_started()
+        item = (message, time.perf_counter())
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                if self.put_timeout <= 0:
+                    raise TimeoutError
+                await asyncio.wait_for(queue.put(item), self.put_timeout)
+            except TimeoutError:
+                self.dropped += 1
+                logger.warning("mail queue full, dropping message to %s", message["To"])
+                return False
+        self.enqueued += 1
+        return True
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _record_sent(self, queued_at: float) -> None:
+        latency = time.perf_counter() - queued_at
+        self.sent += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    async def _send_batch(self, batch: list[tuple[EmailMessage, float]]) -> None:
+        self.batches += 1
+        pending = deque(batch)
+        try:
+            async with self.pool.connection() as client:
+                while pending:
+                    with timer("smtp_send"):
+                        await client.send_message(pending[0][0])
+                    self._record_sent(pending.popleft()[1])
+        except Exception as err:
+            logger.warning("mail batch interrupted (%s), sending the rest one by one", err)
+
+        # Whatever is left gets a fresh connection each
+        for message, queued_at in pending:
+            try:
+                with timer("smtp_send"):
+                    await self.pool.send(message)
+            except Exception:
+                self.failed += 1
+                logger.exception("send email to %s failed", message["To"])
+            else:
+                self._record_sent(queued_at)
+
+    async def drain(self) -> None:
+        if self._queue is not None and self._binding.is_current():
+            await self._queue.join()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Give queued mail a chance to go out, then cancel the workers."""
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except TimeoutError:
+            logger.warning("mail queue stopped with %d messages pending", self.depth)
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._binding.reset()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "latency_avg": self.latency_total / self.sent if self.sent else 0.0,
+            "latency_max": self.latency_max,
+        }
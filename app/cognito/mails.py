@@ -3,25 +3,42 @@ from dataclasses import dataclass
 from datetime import timedelta
 
 # from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
 from fastapi import Request
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
 
+from app import metrics
+from app.cognito.mail_queue import MailQueue
+from app.cognito.smtp import SMTPPool
 from app.cognito.token import create_access_token
+from app.metrics import timer
+from app.settings import settings
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-SMTP_HOST = "localhost"
-SMTP_PORT = 1025  # Mailcatcher
-EMAILS_FROM_NAME = "Dev"
-EMAILS_FROM_EMAIL = "dev@local.test"
-EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
-PROJECT_NAME = "FastAPI HTMX Login"
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates" / "build"
+
+mail_pool = SMTPPool(
+    settings.smtp_host,
+    settings.smtp_port,
+    size=settings.smtp_pool_size,
+    timeout=settings.smtp_timeout,
+    **settings.smtp_options,
+)
+mail_queue = MailQueue(
+    mail_pool,
+    maxsize=settings.mail_queue_size,
+    workers=settings.mail_queue_workers,
+    batch_size=settings.mail_batch_size,
+    put_timeout=settings.mail_queue_put_timeout,
+)
+if metrics.enabled:
+    metrics.registry.gauge("mail_queue", mail_queue.stats)
 
 
 @dataclass
@@ -30,51 +47,63 @@ class EmailData:
     subject: str
 
 
+# Compiled templates are cached by the environment, so each file is read and compiled once
+email_templates = Environment(
+    loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+    auto_reload=settings.email_templates_auto_reload,
+    cache_size=-1,
+)
+
+
+def load_email_templates() -> None:
+    """Compile every built email template up front, e.g. at startup."""
+    for name in email_templates.list_templates(extensions=["html"]):
+        email_templates.get_template(name)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (Path(__file__).parent / "email-templates" / "build" / template_name).read_text()
-    html_content = Template(template_str).render(context)
+    with timer("email_render"):
+        html_content = email_templates.get_template(template_name).render(context)
     return html_content
 
 
-def send_email(
+def build_message(*, email: str, subject: str = "", html_content: str = "") -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((settings.emails_from_name, settings.emails_from_email))
+    message["To"] = email
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+async def send_email(
     *,
     email: str,
     subject: str = "",
     html_content: str = "",
 ) -> None:
     # assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(EMAILS_FROM_NAME, EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {"host": SMTP_HOST, "port": SMTP_PORT}
-    # if settings.SMTP_TLS:
-    #     smtp_options["tls"] = True
-    # elif settings.SMTP_SSL:
-    #     smtp_options["ssl"] = True
-    # if settings.SMTP_USER:
-    #     smtp_options["user"] = settings.SMTP_USER
-    # if settings.SMTP_PASSWORD:
-    #     smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
-
-
-def send_magic_link_email(email: str, request: Request):
-    logger.info("send magic email in background ;) ")
-    project_name = PROJECT_NAME
+    message = build_message(email=email, subject=subject, html_content=html_content)
+    # Delivery happens in the mail queue workers; failures are counted there
+    queued = await mail_queue.put(message)
+    logger.info("email %s", "queued" if queued else "dropped", extra={"to": email})
+
+
+async def send_magic_link_email(email: str, request: Request):
+    project_name = settings.project_name
     subject = f"{project_name} - Magic link for user {email}"
 
-    magic_token = create_access_token(data={"sub": email}, expires_delta=timedelta(minutes=5))
+    magic_token = create_access_token(
+        data={"sub": email, "purpose": "magic_link"}, expires_delta=timedelta(minutes=5)
+    )
     magic_link = f"/magic-link-verify?token={magic_token}"
     magical = f"{request.base_url.scheme}://{request.base_url.netloc}{magic_link}"
-    logger.info(f"Magic Link for {email}: {magical}")
+    logger.debug("magic link for %s: %s", email, magical)
 
     html_content = render_email_template(
         template_name="magic_link_email.html",
         context={
-            "project_name": PROJECT_NAME,
+            "project_name": settings.project_name,
             "username": email,
             "email": email,
             # MJML expects `link`; magic link expires in 5 minutes (wording in template)
@@ -84,16 +113,15 @@ def send_magic_link_email(email: str, request: Request):
 
     email_data = EmailData(html_content=html_content, subject=subject)
 
-    send_email(
+    await send_email(
         email=email,
         subject=email_data.subject,
         html_content=email_data.html_content,
     )
 
 
-def send_password_reset_email(email: str, request: Request):
-    logger.info("send reset email in background ;) ")
-    project_name = PROJECT_NAME
+async def send_password_reset_email(email: str, request: Request):
+    project_name = settings.project_name
     subject = f"{project_name} - Reset password link for user {email}"
 
     # Issue a short-lived reset token (different purpose than access)
@@ -101,23 +129,23 @@ def send_password_reset_email(email: str, request: Request):
     reset_link = (
         f"{request.base_url.scheme}://{request.base_url.netloc}/reset-password?token={reset_token}"
     )
-    logger.info(f"Reset Link for {email}: {reset_link}")
+    logger.debug("reset link for %s: %s", email, reset_link)
 
     html_content = render_email_template(
         template_name="reset_password.html",
         context={
-            "project_name": PROJECT_NAME,
+            "project_name": settings.project_name,
             "username": email,
             "email": email,
             "link": reset_link,
             # Surface validity to template text
-            "valid_hours": EMAIL_RESET_TOKEN_EXPIRE_HOURS,
+            "valid_hours": settings.email_reset_token_expire_hours,
         },
     )
 
     email_data = EmailData(html_content=html_content, subject=subject)
 
-    send_email(
+    await send_email(
         email=email,
         subject=email_data.subject,
         html_content=email_data.html_content,
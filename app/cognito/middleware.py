@@ -0,0 +1,26 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CookieRefreshMiddleware:
+    """
+    Adds the Set-Cookie header that get_current_user leaves in
+    `request.state.refresh_cookie` when a session or token is close to expiry,
+    whatever response the route itself returns.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                header = scope.get("state", {}).get("refresh_cookie")
+                if header is not None:
+                    message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
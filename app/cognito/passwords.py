@@ -0,0 +1,107 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.settings import settings
+
+SCHEME = "scrypt"
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+
+
+def hash_password(password: str, n: int, r: int, p: int) -> str:
+    """Returns `scrypt$n$r$p$salt$hash`; top-level so it can run in a process pool."""
+    salt = os.urandom(16)
+    return f"{SCHEME}${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    if not stored.startswith(f"{SCHEME}$"):
+        # Legacy plaintext entry, upgraded on the next successful login
+        return hmac.compare_digest(password.encode(), stored.encode())
+    _, n, r, p, salt, expected = stored.split("$")
+    actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    return hmac.compare_digest(actual, base64.b64decode(expected))
+
+
+class PasswordHasher:
+    """
+    Runs the CPU-bound KDF off the event loop. The default thread pool is enough
+    because hashlib.scrypt releases the GIL; a process pool can be chosen instead.
+    Keeps the last verify latencies to report percentiles.
+    """
+
+    def __init__(
+        self,
+        n: int = settings.password_scrypt_n,
+        r: int = settings.password_scrypt_r,
+        p: int = settings.password_scrypt_p,
+        workers: int = settings.password_hash_workers,
+        executor: str = settings.password_hash_executor,
+    ):
+        self.params = (n, r, p)
+        self.workers = workers
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self._dummy_hash: str | None = None
+        self._latencies: deque[float] = deque(maxlen=1024)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.executor_kind == "process" else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, *self.params)
+
+    def needs_rehash(self, stored: str) -> bool:
+        n, r, p = self.params
+        return not stored.startswith(f"{SCHEME}${n}${r}${p}$")
+
+    async def verify(self, password: str, stored: str | None) -> tuple[bool, bool]:
+        """
+        Returns (valid, needs_rehash). With no stored hash (unknown user) a dummy
+        hash is still checked so both cases cost the same.
+        """
+        if stored is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self.hash(os.urandom(16).hex())
+            await self._run(verify_password, password, self._dummy_hash)
+            return False, False
+
+        start = time.perf_counter()
+        valid = await self._run(verify_password, password, stored)
+        self._latencies.append(time.perf_counter() - start)
+        return valid, valid and self.needs_rehash(stored)
+
+    def latency_stats(self) -> dict[str, float]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return {"count": 0, "p50": 0.0, "p99": 0.0}
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return {"count": len(samples), "p50": statistics.median(samples), "p99": p99}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
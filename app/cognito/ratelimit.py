@@ -0,0 +1,150 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+from app.settings import settings
+
+# Per-window state: [window id, hits in that window, hits in the window before]
+Entry = list[int]
+
+
+class ShardedCounterStore:
+    """
+    In-process sliding-window counters split over several independently locked
+    shards, so concurrent callers rarely contend. Each shard keeps at most
+    `max_keys` keys and drops the oldest ones first.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self.max_keys = max(1, max_keys // shards)
+        self._shards: list[tuple[threading.Lock, dict[str, Entry]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+
+    def hit(self, key: str, window: int) -> tuple[int, int]:
+        """Counts one hit for `key` in `window`; returns (current, previous) window counts."""
+        lock, counters = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            entry = counters.get(key)
+            if entry is None:
+                if len(counters) >= self.max_keys:
+                    del counters[next(iter(counters))]
+                entry = counters[key] = [window, 0, 0]
+            elif entry[0] != window:
+                entry[2] = entry[1] if entry[0] == window - 1 else 0
+                entry[0], entry[1] = window, 0
+            entry[1] += 1
+            return entry[1], entry[2]
+
+    def clear(self) -> None:
+        for lock, counters in self._shards:
+            with lock:
+                counters.clear()
+
+
+class SharedCounterStore(Protocol):
+    """
+    Counters shared by all workers, e.g. Redis with `INCR {key}:{window}` plus an
+    `EXPIRE` of two windows, and a `GET` of the previous window.
+    """
+
+    async def hit(self, key: str, window: int) -> tuple[int, int]: ...
+
+
+class MemorySharedStore:
+    """Stand-in for a shared backend; one instance shared by several limiters acts like Redis."""
+
+    def __init__(self):
+        self._store = ShardedCounterStore(shards=1)
+
+    async def hit(self, key: str, window: int) -> tuple[int, int]:
+        return self._store.hit(key, window)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+class RateLimiter:
+    """
+    Sliding-window limit of `limit` hits per `period` seconds per key. The local
+    store is always consulted first; only when it still allows the hit is the
+    shared store (if any) asked for the cluster-wide count.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        period: float,
+        local: ShardedCounterStore | None = None,
+        shared: SharedCounterStore | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.local = local or ShardedCounterStore()
+        self.shared = shared
+        self.clock = clock
+
+    def _retry_after(self, counts: tuple[int, int], now: float) -> float:
+        current, previous = counts
+        elapsed = (now % self.period) / self.period
+        if previous * (1 - elapsed) + current <= self.limit:
+            return 0.0
+        return self.period - (now % self.period)
+
+    async def hit(self, key: str) -> float:
+        """Counts a hit; returns 0 if allowed, else the seconds to wait."""
+        now = self.clock()
+        window = int(now // self.period)
+        key = f"{self.name}:{key}"
+        retry_after = self._retry_after(self.local.hit(key, window), now)
+        if retry_after or self.shared is None:
+            return retry_after
+        return self._retry_after(await self.shared.hit(key, window), now)
+
+
+class AuthRateLimits:
+    """Per-action budgets, e.g. `login:ip` and `login:email`, checked together."""
+
+    def __init__(
+        self,
+        budgets: dict[str, tuple[int, float]],
+        shared: SharedCounterStore | None = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.local = ShardedCounterStore()
+        self.limiters = {
+            name: RateLimiter(name, limit, period, self.local, shared)
+            for name, (limit, period) in budgets.items()
+        }
+
+    async def check(self, action: str, **subjects: str) -> float:
+        """
+        Returns 0 if the action is allowed for every subject (ip=..., email=...),
+        otherwise the seconds until it may be retried. Stops at the first refusal.
+        """
+        if not self.enabled:
+            return 0.0
+        for kind, value in subjects.items():
+            limiter = self.limiters.get(f"{action}:{kind}")
+            if limiter is None or not value:
+                continue
+            retry_after = await limiter.hit(value.lower())
+            if retry_after:
+                return retry_after
+        return 0.0
+
+    def reset(self) -> None:
+        self.local.clear()
+
+
+def client_ip(request) -> str:
+    client = getattr(request, "client", None)
+    return client.host if client else "unknown"
+
+
+rate_limits = AuthRateLimits(settings.rate_limits, enabled=settings.rate_limit_enabled)
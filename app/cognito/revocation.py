@@ -0,0 +1,128 @@
+import heapq
+import logging
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+from app.cognito.token import InvalidTokenError, engine
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UsedTokenIndex:
+    """
+    Remembers used token ids (jti) until the token would have expired anyway.
+    Ids are kept in sets bucketed by the token's `exp`, so a lookup only touches
+    one bucket and whole buckets are dropped once they lie in the past. Memory
+    follows the number of used, still-valid tokens; past `max_entries` the
+    soonest-expiring bucket is dropped early, and from then on every token
+    expiring in or before that bucket is refused, since it can no longer be
+    told whether it was used.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = settings.used_token_bucket_seconds,
+        max_entries: int = settings.used_token_max_entries,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._buckets: dict[int, set[str]] = {}
+        self._order: list[int] = []  # heap of bucket ids
+        self._size = 0
+        self._evicted = -1  # newest bucket dropped before it expired
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _drop_oldest(self) -> int:
+        bucket = heapq.heappop(self._order)
+        self._size -= len(self._buckets.pop(bucket))
+        return bucket
+
+    def _expire(self, now: float) -> None:
+        current = int(now // self.bucket_seconds)
+        while self._order and self._order[0] < current:
+            self._drop_oldest()
+
+    def use(self, jti: str, exp: float) -> bool:
+        """Marks `jti` as used; returns False if it was used before."""
+        self._expire(self.clock())
+        bucket = int(exp // self.bucket_seconds)
+        if bucket <= self._evicted:
+            return False
+        ids = self._buckets.get(bucket)
+        if ids is None:
+            ids = self._buckets[bucket] = set()
+            heapq.heappush(self._order, bucket)
+        elif jti in ids:
+            return False
+
+        ids.add(jti)
+        self._size += 1
+        if self._size > self.max_entries:
+            self._evicted = self._drop_oldest()
+            logger.warning(
+                "used token index full, refusing tokens expiring before %s",
+                (self._evicted + 1) * self.bucket_seconds,
+            )
+        return True
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._order.clear()
+        self._size = 0
+        self._evicted = -1
+
+
+class SharedUsedTokenStore(Protocol):
+    """
+    Used-token ids shared by all workers, e.g. Redis `SET used:{jti} 1 NX EXAT {exp}`
+    where a failed NX means the token was already used.
+    """
+
+    async def use(self, jti: str, exp: float) -> bool: ...
+
+
+class MemorySharedUsedTokenStore:
+    """Stand-in for a shared backend in tests and single-host setups."""
+
+    def __init__(self):
+        self._index = UsedTokenIndex()
+
+    async def use(self, jti: str, exp: float) -> bool:
+        return self._index.use(jti, exp)
+
+
+class UsedTokens:
+    """Local index in front of an optional shared store."""
+
+    def __init__(
+        self, local: UsedTokenIndex | None = None, shared: SharedUsedTokenStore | None = None
+    ):
+        self.local = local or UsedTokenIndex()
+        self.shared = shared
+
+    async def use(self, jti: str, exp: float) -> bool:
+        if not self.local.use(jti, exp):
+            return False
+        return self.shared is None or await self.shared.use(jti, exp)
+
+
+used_tokens = UsedTokens()
+
+
+async def consume_token(token: str, expected_purpose: str | None = None) -> tuple[bool, str | None]:
+    """Like decode_token, but each token is accepted only once."""
+    try:
+        claims = engine.verify(token, expected_purpose)
+    except InvalidTokenError:
+        return False, None
+
+    jti = claims.get("jti")
+    if not jti or not await used_tokens.use(jti, claims["exp"]):
+        return False, None
+    return True, claims["sub"]
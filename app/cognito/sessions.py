@@ -0,0 +1,149 @@
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from app.cognito.sqlite import SQLitePool
+from app.settings import settings
+
+
+class Session:
+    __slots__ = ("id", "email", "created_at", "expires_at", "version")
+
+    def __init__(self, id: str, email: str, created_at: float, expires_at: float, version: int = 0):
+        self.id = id
+        self.email = email
+        self.created_at = created_at
+        self.expires_at = expires_at
+        # The user's token version at login; a password reset bumps it and ends the session
+        self.version = version
+
+
+class SessionStore(Protocol):
+    async def get(self, session_id: str) -> Session | None: ...
+
+    async def save(self, session: Session) -> None: ...
+
+    async def delete(self, session_id: str) -> None: ...
+
+
+class MemorySessionStore:
+    """Sessions of this worker only, least recently used evicted past `maxsize`."""
+
+    def __init__(self, maxsize: int = settings.session_max_entries):
+        self.maxsize = maxsize
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, session_id: str) -> Session | None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    async def save(self, session: Session) -> None:
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore:
+    """Sessions shared by every worker on the host; expired rows are purged on save."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.pool = SQLitePool(path, size=pool_size)
+        with self.pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, email TEXT NOT NULL,"
+                " created_at REAL NOT NULL, expires_at REAL NOT NULL,"
+                " version INTEGER NOT NULL DEFAULT 0"
+                ") WITHOUT ROWID"
+            )
+            # Databases created before sessions carried the user's version
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+
+    @staticmethod
+    def _get(conn: sqlite3.Connection, session_id: str) -> Session | None:
+        row = conn.execute(
+            "SELECT id, email, created_at, expires_at, version FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        return Session(*row) if row else None
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, session: Session) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, email, created_at, expires_at, version)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (session.id, session.email, session.created_at, session.expires_at, session.version),
+        )
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, session_id: str) -> None:
+        conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    async def get(self, session_id: str) -> Session | None:
+        return await self.pool.run(self._get, session_id)
+
+    async def save(self, session: Session) -> None:
+        await self.pool.run(self._save, session)
+
+    async def delete(self, session_id: str) -> None:
+        await self.pool.run(self._delete, session_id)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class SessionManager:
+    """Creates, looks up, slides and revokes server-side sessions."""
+
+    def __init__(self, store: SessionStore, ttl_seconds: float = settings.session_ttl_minutes * 60):
+        self.store = store
+        self.ttl = ttl_seconds
+
+    async def create(self, email: str, version: int = 0) -> Session:
+        now = time.time()
+        session = Session(secrets.token_urlsafe(32), email, now, now + self.ttl, version)
+        await self.store.save(session)
+        return session
+
+    async def get(self, session_id: str) -> Session | None:
+        session = await self.store.get(session_id)
+        if session is None or session.expires_at <= time.time():
+            return None
+        return session
+
+    async def extend(self, session: Session) -> Session:
+        session.expires_at = time.time() + self.ttl
+        await self.store.save(session)
+        return session
+
+    async def revoke(self, session_id: str) -> None:
+        await self.store.delete(session_id)
+
+
+def make_session_store(url: str = settings.session_store) -> SessionStore:
+    """`memory` or `sqlite:///path/to/sessions.db`."""
+    if url == "memory":
+        return MemorySessionStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url.removeprefix("sqlite:///"))
+    raise ValueError(f"Unsupported session store: {url}")
+
+
+sessions = SessionManager(make_session_store())
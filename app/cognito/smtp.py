@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from functools import cache
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiosmtplib
+
+from app.cognito.loops import LoopBinding
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def client_module() -> ModuleType:
+    """aiosmtplib, imported on the first connection (or at startup to warm up)."""
+    import aiosmtplib
+
+    return aiosmtplib
+
+
+@cache
+def retryable_errors() -> tuple[type[BaseException], ...]:
+    """Errors after which a fresh connection is worth one more try."""
+    smtp = client_module()
+    return (
+        smtp.SMTPServerDisconnected,
+        smtp.SMTPConnectError,
+        smtp.SMTPTimeoutError,
+        ConnectionError,
+    )
+
+
+class SMTPPool:
+    """
+    Small pool of persistent SMTP connections for asyncio code.
+    Connections are opened lazily, reused across messages and replaced when the
+    server drops them. At most `size` connections are in use at any time.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 2, timeout: float = 10.0, **options):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.options = options  # passed on to aiosmtplib.SMTP (start_tls, username, ...)
+        self.connects = 0
+        self._binding = LoopBinding()
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: list[aiosmtplib.SMTP] = []
+
+    def _bind(self) -> asyncio.Semaphore:
+        if self._binding.rebind():
+            self._slots = asyncio.Semaphore(self.size)
+            self._idle = []
+        return self._slots
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        client = client_module().SMTP(
+            hostname=self.host, port=self.port, timeout=self.timeout, **self.options
+        )
+        await client.connect()
+        self.connects += 1
+        return client
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["aiosmtplib.SMTP"]:
+        """Borrow a connected client; it goes back to the pool unless the caller failed."""
+        async with self._bind():
+            client = self._idle.pop() if self._idle else None
+            if client is None or not client.is_connected:
+                client = await self._connect()
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            self._idle.append(client)
+
+    async def send(self, message: EmailMessage, retries: int = 1) -> None:
+        for attempt in range(retries + 1):
+            try:
+                async with self.connection() as client:
+                    await client.send_message(message)
+                return
+            except retryable_errors() as err:
+                if attempt == retries:
+                    raise
+                logger.warning("SMTP connection failed (%s), reconnecting", err)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        if not self._binding.is_current():
+            return
+        for client in idle:
+            try:
+                await client.quit()
+            except (client_module().SMTPException, OSError):
+                client.close()
@@ -0,0 +1,44 @@
+import asyncio
+import queue
+import sqlite3
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SQLitePool:
+    """
+    Fixed set of autocommit SQLite connections in WAL mode, handed out one at a
+    time. `run` executes a function with a connection in a worker thread so the
+    event loop never waits on disk.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def call(self, func: Callable[..., T], *args) -> T:
+        with self.connection() as conn:
+            return func(conn, *args)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        return await asyncio.to_thread(self.call, func, *args)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
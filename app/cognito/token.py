@@ -1,33 +1,316 @@
-from datetime import datetime, timedelta
+import abc
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from datetime import timedelta
 
-from jose import JWTError, jwt
-
-from config import SECRET_KEY
+from app.cognito.keys import LEGACY_KID, Keyring, load_keyring
+from app.metrics import timer
+from app.settings import settings
 
 # Configuration
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+class InvalidTokenError(Exception):
+    """Raised for any token that is malformed, badly signed, expired or has wrong claims."""
 
 
-def decode_token(token, expected_purpose: str | None = None) -> tuple[bool, str | None]:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        purpose: str = payload.get("purpose")
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _b64decode_signature(data: bytes) -> bytes:
+    """
+    Strict variant for signatures: only the canonical unpadded spelling is
+    accepted, so a token cannot be varied (e.g. in its trailing bits) and
+    still verify.
+    """
+    raw = base64.b64decode(data + b"=" * (-len(data) % 4), altchars=b"-_", validate=True)
+    if _b64encode(raw) != data:
+        raise InvalidTokenError("Non-canonical signature encoding")
+    return raw
+
+
+class JoseBackend:
+    """Reference backend delegating to python-jose (imported only when this backend is used)."""
+
+    name = "jose"
+
+    def __init__(self, keyring: Keyring, algorithm: str = ALGORITHM):
+        from jose import JWTError, jwt
+
+        self._jwt, self._error = jwt, JWTError
+        self.keyring = keyring
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        kid = self.keyring.active
+        secret = self.keyring.keys[kid]
+        return self._jwt.encode(claims, secret, algorithm=self.algorithm, headers={"kid": kid})
+
+    def decode(self, token: str) -> dict:
+        try:
+            kid = self._jwt.get_unverified_header(token).get("kid", LEGACY_KID)
+            secret = self.keyring.keys.get(kid)
+            if secret is None:
+                raise InvalidTokenError("Unknown key id")
+            return self._jwt.decode(token, secret, algorithms=[self.algorithm])
+        except self._error as err:
+            raise InvalidTokenError(str(err)) from err
+
+    def jwks(self) -> dict:
+        return {"keys": []}
+
+
+class CompactBackend(abc.ABC):
+    """
+    Shared compact-JWT handling for the in-house backends. Header segments are
+    serialized once per key and, once seen, mapped straight to their
+    verification key, so each distinct header is parsed only once and the key
+    lookup is a single dict access however many keys the ring holds.
+    """
+
+    algorithm: str
+
+    def __init__(self, verify_keys: dict, active_kid: str, signing_key):
+        self._verify_keys = verify_keys
+        self._signing_key = signing_key
+        header = {"alg": self.algorithm, "kid": active_kid, "typ": "JWT"}
+        self._header = _b64encode(json.dumps(header, separators=(",", ":")).encode())
+        # Header segments already seen, mapped to the key they name
+        self._known_headers = {self._header: verify_keys[active_kid]}
+
+    @abc.abstractmethod
+    def _sign(self, signing_input: bytes) -> bytes: ...
+
+    @abc.abstractmethod
+    def _check(self, key, signing_input: bytes, signature: bytes) -> bool: ...
+
+    def encode(self, claims: dict) -> str:
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = self._header + b"." + payload
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def _key_for(self, header: bytes):
+        key = self._known_headers.get(header)
+        if key is not None:
+            return key
+        try:
+            parsed = json.loads(_b64decode(header))
+        except (ValueError, binascii.Error) as err:
+            raise InvalidTokenError("Invalid header") from err
+        if not isinstance(parsed, dict) or parsed.get("alg") != self.algorithm:
+            raise InvalidTokenError("Unexpected algorithm")
+        key = self._verify_keys.get(parsed.get("kid", LEGACY_KID))
+        if key is None:
+            raise InvalidTokenError("Unknown key id")
+        return key
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, _, signature = raw.rpartition(b".")
+            header, _, payload = signing_input.partition(b".")
+            if not header or not payload:
+                raise InvalidTokenError("Not enough segments")
+            key = self._key_for(header)
+            if not self._check(key, signing_input, _b64decode_signature(signature)):
+                raise InvalidTokenError("Signature verification failed")
+            claims = json.loads(_b64decode(payload))
+        except (UnicodeEncodeError, ValueError, binascii.Error) as err:
+            raise InvalidTokenError("Malformed token") from err
+
+        if not isinstance(claims, dict):
+            raise InvalidTokenError("Invalid payload")
+        if len(self._known_headers) < 16 * len(self._verify_keys):
+            self._known_headers[header] = key
+
+        now = time.time()
+        exp = claims.get("exp")
+        if exp is not None and (not isinstance(exp, int | float) or exp < int(now)):
+            raise InvalidTokenError("Signature has expired")
+        nbf = claims.get("nbf")
+        if nbf is not None and (not isinstance(nbf, int | float) or nbf > now):
+            raise InvalidTokenError("The token is not yet valid")
+        return claims
+
+    def jwks(self) -> dict:
+        """Public keys for other verifiers; symmetric backends have none to share."""
+        return {"keys": []}
+
+
+class HmacBackend(CompactBackend):
+    """
+    HS256 fast path: the HMAC key schedule of every key in the ring is computed
+    once and copied per token. Produces and accepts the same compact JWTs as
+    python-jose.
+    """
+
+    name = "hmac"
 
-        if email is None:
-            raise JWTError
+    def __init__(self, keyring: Keyring, algorithm: str = ALGORITHM):
+        if algorithm != "HS256":
+            raise ValueError(f"HmacBackend only supports HS256, got {algorithm}")
+        self.algorithm = algorithm
+        macs = {
+            kid: hmac.new(secret.encode(), digestmod=hashlib.sha256)
+            for kid, secret in keyring.keys.items()
+        }
+        super().__init__(macs, keyring.active, macs[keyring.active])
 
-        if expected_purpose and purpose != expected_purpose:
-            raise JWTError
+    @staticmethod
+    def _digest(mac, signing_input: bytes) -> bytes:
+        mac = mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
 
-        return True, email
-    except JWTError:
+    def _sign(self, signing_input: bytes) -> bytes:
+        return self._digest(self._signing_key, signing_input)
+
+    def _check(self, mac, signing_input: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self._digest(mac, signing_input), signature)
+
+
+class EdDSABackend(CompactBackend):
+    """
+    Ed25519 signatures, so other services can verify tokens with the public keys
+    from /.well-known/jwks.json instead of sharing the secret. Each key in the
+    ring is a seed for one key pair; parsed keys are built once per kid.
+    `cryptography` is imported only when this backend is used.
+    """
+
+    name = "eddsa"
+    algorithm = "EdDSA"
+
+    def __init__(self, keyring: Keyring | None = None, public_keys: dict | None = None):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+        self._invalid_signature = InvalidSignature
+        self._private_keys = {
+            kid: Ed25519PrivateKey.from_private_bytes(hashlib.sha256(secret.encode()).digest())
+            for kid, secret in (keyring.keys.items() if keyring else ())
+        }
+        if public_keys is None:
+            public_keys = {kid: key.public_key() for kid, key in self._private_keys.items()}
+        active = keyring.active if keyring else next(iter(public_keys))
+        super().__init__(public_keys, active, self._private_keys.get(active))
+
+    @classmethod
+    def from_jwks(cls, jwks: dict) -> "EdDSABackend":
+        """Verify-only backend, e.g. for a gateway that fetched our JWKS."""
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+        public_keys = {
+            jwk["kid"]: Ed25519PublicKey.from_public_bytes(_b64decode(jwk["x"].encode()))
+            for jwk in jwks["keys"]
+            if jwk.get("kty") == "OKP" and jwk.get("crv") == "Ed25519"
+        }
+        if not public_keys:
+            raise ValueError("No Ed25519 keys in JWKS")
+        return cls(public_keys=public_keys)
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self._signing_key is None:
+            raise InvalidTokenError("Verify-only backend cannot sign")
+        return self._signing_key.sign(signing_input)
+
+    def _check(self, public_key, signing_input: bytes, signature: bytes) -> bool:
+        try:
+            public_key.verify(signature, signing_input)
+        except self._invalid_signature:
+            return False
+        return True
+
+    def jwks(self) -> dict:
+        from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+        keys = []
+        for kid, key in self._verify_keys.items():
+            raw = key.public_bytes(Encoding.Raw, PublicFormat.Raw)
+            keys.append(
+                {
+                    "kty": "OKP",
+                    "crv": "Ed25519",
+                    "alg": self.algorithm,
+                    "use": "sig",
+                    "kid": kid,
+                    "x": _b64encode(raw).decode(),
+                }
+            )
+        return {"keys": keys}
+
+
+BACKENDS = {backend.name: backend for backend in (JoseBackend, HmacBackend, EdDSABackend)}
+
+
+class TokenEngine:
+    """Single place to sign and verify tokens, independent of the JWT backend in use."""
+
+    def __init__(self, backend: JoseBackend | CompactBackend):
+        self.backend = backend
+
+    def issue(self, data: dict, expires_delta: timedelta | None = None) -> str:
+        claims = data.copy()
+        lifetime = expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
+        claims["exp"] = int(time.time() + lifetime.total_seconds())
+        # Unique id so single-use tokens (magic links, resets) can be tracked
+        claims.setdefault("jti", secrets.token_urlsafe(12))
+        with timer("token_encode"):
+            return self.backend.encode(claims)
+
+    def verify(self, token: str, expected_purpose: str | None = None) -> dict:
+        """Returns the verified claims or raises InvalidTokenError."""
+        with timer("token_decode"):
+            claims = self.backend.decode(token)
+        if not claims.get("sub"):
+            raise InvalidTokenError("Missing subject")
+        if expected_purpose and claims.get("purpose") != expected_purpose:
+            raise InvalidTokenError("Unexpected token purpose")
+        return claims
+
+
+def make_engine(
+    backend: str = settings.token_backend,
+    secret: str | None = None,
+    keyring: Keyring | None = None,
+) -> TokenEngine:
+    """Engine over `keyring`, a single `secret`, or the configured keyring by default."""
+    if keyring is None:
+        keyring = Keyring.single(secret) if secret else load_keyring()
+    return TokenEngine(BACKENDS[backend](keyring))
+
+
+engine = make_engine()
+
+
+def create_access_token(
+    data: dict, expires_delta: timedelta | None = None, principal: dict | None = None
+):
+    """`principal` (see app.cognito.authz) adds its sub, tenant, role and version claims."""
+    if principal is not None:
+        data = {
+            "sub": principal["email"],
+            "tenant": principal["tenant"],
+            "role": principal["role"],
+            "version": principal["version"],
+            **data,
+        }
+    return engine.issue(data, expires_delta)
+
+
+def decode_token(token, expected_purpose: str | None = None) -> tuple[bool, str | None]:
+    try:
+        claims = engine.verify(token, expected_purpose)
+        return True, claims["sub"]
+    except InvalidTokenError:
         return False, None
@@ -0,0 +1,151 @@
+import sqlite3
+from collections.abc import Iterable
+from typing import Protocol
+
+from app.cognito.sqlite import SQLitePool
+from app.metrics import timer
+from app.settings import settings
+from config import USERS
+
+
+class UserRepository(Protocol):
+    """
+    Storage for user records, looked up by email. Records carry `email`,
+    `password`, `tenant`, `role` and `version`; bumping `version` invalidates
+    every access token issued to the user before.
+    """
+
+    async def get_by_email(self, email: str) -> dict | None: ...
+
+    async def update_password(
+        self, email: str, password: str, invalidate_tokens: bool = False
+    ) -> bool: ...
+
+
+def _with_defaults(email: str, user: dict) -> dict:
+    return {
+        "email": email,
+        "tenant": settings.default_tenant,
+        "role": settings.default_role,
+        "version": 0,
+        **user,
+    }
+
+
+class InMemoryUserRepository:
+    """Keeps users in a plain dict; fine for a single process and for tests."""
+
+    def __init__(self, users: dict[str, dict]):
+        self.users = users
+
+    async def get_by_email(self, email: str) -> dict | None:
+        with timer("user_lookup"):
+            user = self.users.get(email)
+        return _with_defaults(email, user) if user else None
+
+    async def update_password(
+        self, email: str, password: str, invalidate_tokens: bool = False
+    ) -> bool:
+        user = self.users.get(email)
+        if user is None:
+            return False
+        user["password"] = password
+        if invalidate_tokens:
+            user["version"] = user.get("version", 0) + 1
+        return True
+
+
+class SQLiteUserRepository:
+    """
+    SQLite-backed users shared by every worker on the host. Lookups use the
+    primary-key index on email; queries run in a thread on a small pool of
+    connections so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool = SQLitePool(path, size=pool_size)
+        self.pool.call(self._create)
+
+    @staticmethod
+    def _create(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " email TEXT PRIMARY KEY, password TEXT NOT NULL,"
+            " tenant TEXT, role TEXT, version INTEGER NOT NULL DEFAULT 0"
+            ") WITHOUT ROWID"
+        )
+        # Databases created before tenants and roles existed
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        for column, ddl in (
+            ("tenant", "tenant TEXT"),
+            ("role", "role TEXT"),
+            ("version", "version INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE users ADD COLUMN {ddl}")
+
+    @staticmethod
+    def _get(conn: sqlite3.Connection, email: str) -> dict | None:
+        row = conn.execute(
+            "SELECT password, tenant, role, version FROM users WHERE email = ?", (email,)
+        ).fetchone()
+        if row is None:
+            return None
+        password, tenant, role, version = row
+        user = {"password": password, "version": version}
+        if tenant:
+            user["tenant"] = tenant
+        if role:
+            user["role"] = role
+        return _with_defaults(email, user)
+
+    @staticmethod
+    def _update_password(
+        conn: sqlite3.Connection, email: str, password: str, invalidate_tokens: bool
+    ) -> bool:
+        cursor = conn.execute(
+            "UPDATE users SET password = ?, version = version + ? WHERE email = ?",
+            (password, int(invalidate_tokens), email),
+        )
+        return cursor.rowcount > 0
+
+    async def get_by_email(self, email: str) -> dict | None:
+        with timer("user_lookup"):
+            return await self.pool.run(self._get, email)
+
+    async def update_password(
+        self, email: str, password: str, invalidate_tokens: bool = False
+    ) -> bool:
+        return await self.pool.run(self._update_password, email, password, invalidate_tokens)
+
+    def seed(self, users: Iterable[tuple]) -> None:
+        """Insert (email, password[, tenant, role]) tuples, keeping users that already exist."""
+        rows = [(*user, None, None)[:4] for user in users]
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (email, password, tenant, role) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def make_user_repository(url: str = settings.user_store) -> UserRepository:
+    """`memory` or `sqlite:///path/to/users.db`."""
+    if url == "memory":
+        return InMemoryUserRepository(USERS)
+    if url.startswith("sqlite:///"):
+        repo = SQLiteUserRepository(url.removeprefix("sqlite:///"))
+        repo.seed(
+            (email, user["password"], user.get("tenant"), user.get("role"))
+            for email, user in USERS.items()
+        )
+        return repo
+    raise ValueError(f"Unsupported user store: {url}")
+
+
+user_repository = make_user_repository()
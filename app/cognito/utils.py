@@ -1,38 +1,171 @@
-from fastapi import HTTPException, Request
-from jose import JWTError, jwt
+import hashlib
+import time
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request, Response
 from starlette.responses import RedirectResponse
 
-from config import SECRET_KEY
+from app.cognito.audit import audit_log
+from app.cognito.authz import principals
+from app.cognito.cache import TTLCache
+from app.cognito.ratelimit import client_ip
+from app.cognito.sessions import sessions
+from app.cognito.token import InvalidTokenError, create_access_token, engine
+from app.settings import settings
+
+SESSION_COOKIE = "session_id"
+
+# Verified tokens keyed by a digest of the cookie value; entries expire at the token's `exp`
+token_cache = TTLCache(maxsize=settings.token_cache_size)
+
+
+def set_auth_cookie(response: Response, key: str, value: str, max_age: int) -> None:
+    """Sets a login cookie; every auth cookie goes through here so they share attributes."""
+    response.set_cookie(key=key, value=value, max_age=max_age, httponly=True, samesite="lax")
+
+
+def cookie_header(key: str, value: str, max_age: int) -> tuple[bytes, bytes]:
+    """Raw Set-Cookie header, for responses built outside the route (see middleware)."""
+    response = Response()
+    set_auth_cookie(response, key, value, max_age)
+    return next(header for header in response.raw_headers if header[0] == b"set-cookie")
+
+
+def _refresh_later(request: Request, key: str, value: str, max_age: int) -> None:
+    # Picked up by CookieRefreshMiddleware when the response starts
+    request.state.refresh_cookie = cookie_header(key, value, max_age)
+
+
+async def set_login_cookie(response: Response, email: str) -> None:
+    """Logs `email` in on `response`, with a server-side session or a JWT cookie."""
+    if settings.session_mode:
+        principal = await principals.get(email)
+        session = await sessions.create(email, principal["version"] if principal else 0)
+        set_auth_cookie(response, SESSION_COOKIE, session.id, int(sessions.ttl))
+        return
+
+    access_token = create_access_token({"sub": email}, principal=await principals.get(email))
+    lifetime = settings.access_token_expire_minutes * 60
+    set_auth_cookie(response, "access_token", f"Bearer {access_token}", lifetime)
+
 
-ALGORITHM = "HS256"
+def _reject(request: Request, reason: str) -> HTTPException:
+    audit_log.record("auth_rejected", ip=client_ip(request), reason=reason)
+    return HTTPException(status_code=302, headers={"Location": "/"})
 
 
-def get_current_user(request: Request):
+async def _session_user(request: Request, session_id: str) -> dict:
+    session = await sessions.get(session_id)
+    if session is None:
+        raise _reject(request, "unknown_session")
+    principal = await principals.get(session.email)
+    if principal is None:
+        raise _reject(request, "unknown_user")
+    if principal["version"] != session.version:
+        # Password reset since login
+        await sessions.revoke(session_id)
+        raise _reject(request, "stale_session")
+
+    # Sliding expiry: push the session out again once it is close to its end
+    if session.expires_at - time.time() < sessions.ttl * settings.session_refresh_threshold:
+        await sessions.extend(session)
+        _refresh_later(request, SESSION_COOKIE, session.id, int(sessions.ttl))
+    return dict(principal)
+
+
+async def get_current_user(request: Request):
+    """
+    The logged-in user's email, tenant, role and granted `roles`. Tokens must
+    carry the user's current tenant and version; role changes apply from the
+    principal cache without waiting for a new token.
+    """
+    if settings.session_mode and (session_id := request.cookies.get(SESSION_COOKIE)):
+        return await _session_user(request, session_id)
+
     token = request.cookies.get("access_token")
     if not token:
-        raise HTTPException(status_code=302, headers={"Location": "/"})
+        raise _reject(request, "no_token")
 
-    try:
-        token = token.replace("Bearer ", "")
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is None:
+        try:
+            token = token.replace("Bearer ", "")
+            payload = engine.verify(token)
+        except InvalidTokenError as err:
+            audit_log.record("auth_rejected", ip=client_ip(request), reason="invalid_token")
+            response = RedirectResponse(url="/")
+            response.delete_cookie("access_token")
+            raise HTTPException(
+                status_code=302,
+                headers={"Location": "/"},
+                detail="Invalid or expired token",
+            ) from err
 
-        # Extract multiple fields
+        # Tokens from before tenants and versions existed count as default/0
         user_data = {
             "email": payload.get("sub"),
-            # "tenant": payload.get("tenant"),
-            # "role": payload.get("role"),
-            # "version": payload.get("version"),
+            "tenant": payload.get("tenant", settings.default_tenant),
+            "version": payload.get("version", 0),
         }
+        cached = (user_data, payload.get("exp"))
+        if cached[1]:
+            token_cache.set(key, cached, expires_at=cached[1])
+
+    user_data, exp = cached
+    principal = await principals.get(user_data["email"])
+    if (
+        principal is None
+        or principal["version"] != user_data["version"]
+        or principal["tenant"] != user_data["tenant"]
+    ):
+        # Password reset, tenant move or deleted user since the token was issued
+        token_cache.pop(key)
+        raise _reject(request, "stale_token")
+
+    # Proactive refresh: hand out a fresh token before this one runs out
+    lifetime = settings.access_token_expire_minutes * 60
+    if exp and exp - time.time() < lifetime * settings.session_refresh_threshold:
+        fresh = create_access_token({}, principal=principal)
+        _refresh_later(request, "access_token", f"Bearer {fresh}", lifetime)
+    return dict(principal)
+
 
-        if not user_data["email"]:
-            raise JWTError
-
-        return user_data
-    except JWTError as err:
-        response = RedirectResponse(url="/")
-        response.delete_cookie("access_token")
-        raise HTTPException(
-            status_code=302,
-            headers={"Location": "/"},
-            detail="Invalid or expired token",
-        ) from err
+def require_role(*roles: str):
+    """
+    Dependency for routes open to users granted any of `roles` (see
+    `role_grants`); others get a 403.
+
+        @app.get("/admin", dependencies=[Depends(require_role("admin"))])
+    """
+
+    async def dependency(user: Annotated[dict, Depends(get_current_user)]) -> dict:
+        if user["roles"].isdisjoint(roles):
+            raise HTTPException(status_code=403, detail="Forbidden")
+        return user
+
+    return dependency
+
+
+async def logout_user(request: Request, response: Response) -> str | None:
+    """
+    Revokes the server-side session (if any) and clears both auth cookies.
+    Returns the email of the user that was logged in, if any.
+    """
+    email = None
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if session_id:
+        if session := await sessions.get(session_id):
+            email = session.email
+        await sessions.revoke(session_id)
+        response.delete_cookie(SESSION_COOKIE)
+    token = request.cookies.get("access_token")
+    if token:
+        token_cache.pop(hashlib.sha256(token.encode()).digest())
+        if email is None:
+            try:
+                email = engine.verify(token.removeprefix("Bearer ")).get("sub")
+            except InvalidTokenError:
+                pass
+    response.delete_cookie("access_token")
+    return email
@@ -0,0 +1,124 @@
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
+
+from app.settings import settings
+
+# JWTs (three base64url parts) and `token=` query values
+TOKEN_PATTERN = re.compile(
+    r"eyJ[\w-]+\.[\w-]+\.[\w-]+|(?<=token=)[^&\s\"']+",
+)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+_handler: QueueHandler | None = None
+
+
+def redact(text: str) -> str:
+    return TOKEN_PATTERN.sub("[redacted]", text)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Plain-text formatter for dev that still masks tokens."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a share of records tagged with a high-volume `event`, e.g.
+    `logger.info("login ok", extra={"event": "login_succeeded"})`. Untagged
+    records always pass.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or random.random() < rate
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolate args on the caller's side (they may change later) but leave
+        # formatting and redaction to the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(
+    level: str = settings.log_level,
+    json_output: bool = settings.log_json,
+    sample_rates: dict[str, float] = settings.log_sample_rates,
+    stream: TextIO | None = None,
+) -> QueueListener:
+    """
+    Route all records through a queue to one writer thread. Call once at
+    startup; calling again replaces the previous setup.
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(
+        JsonFormatter()
+        if json_output
+        else RedactingFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _handler = _QueueHandler(records)
+    _handler.addFilter(SamplingFilter(sample_rates))
+    _listener = QueueListener(records, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and detach the queue handler."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
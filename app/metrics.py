@@ -0,0 +1,124 @@
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import settings
+
+# Seconds; chosen for in-process work from microseconds (token checks) to seconds (SMTP)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with plain counters and no lock. Observations
+    come from the event loop; the rare update from a threadpool thread may race,
+    which is an acceptable error for latency metrics.
+    """
+
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self.gauges: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms.setdefault(key, Histogram())
+        return hist
+
+    def gauge(self, prefix: str, collect: Callable[[], dict[str, float]]) -> None:
+        """Registers a callback returning `{name: value}`, exported as `<prefix>_<name>`."""
+        self.gauges[prefix] = collect
+
+    def render(self) -> str:
+        lines: list[str] = []
+        seen: set[str] = set()
+        for (name, labels), hist in sorted(self.histograms.items()):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            buckets, total, seconds = list(hist.buckets), hist.count, hist.sum
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            sep = "," if label_str else ""
+            cumulative = 0
+            for bound, hits in zip((*BUCKETS, "+Inf"), buckets, strict=True):
+                cumulative += hits
+                lines.append(f'{name}_bucket{{{label_str}{sep}le="{bound}"}} {cumulative}')
+            suffix = f"{{{label_str}}}" if label_str else ""
+            lines.append(f"{name}_sum{suffix} {seconds}")
+            lines.append(f"{name}_count{suffix} {total}")
+        for prefix, collect in sorted(self.gauges.items()):
+            for key, value in collect().items():
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+enabled = settings.metrics_enabled
+
+
+@contextmanager
+def _timed(hist: Histogram) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - start)
+
+
+def timer(section: str):
+    """`with timer("token_decode"): ...` records into app_section_seconds; no-op when disabled."""
+    if not enabled:
+        return nullcontext()
+    return _timed(registry.histogram("app_section_seconds", section=section))
+
+
+class MetricsMiddleware:
+    """Records request latency per route template (e.g. `/welcome`) and status code."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            registry.histogram(
+                "http_request_duration_seconds",
+                method=scope["method"],
+                route=path,
+                status=str(status),
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,82 @@
+"""
+Production launcher: `python -m app.server [--workers N] ...`.
+
+Runs the app on N worker processes (CPU count by default) under uvicorn's
+supervisor, with uvloop and httptools when they are installed. Send SIGHUP to
+the supervisor for a graceful restart of all workers, SIGTTIN/SIGTTOU to add
+or remove one. `--dev` gives the single-process auto-reload setup instead.
+"""
+
+import argparse
+import importlib.util
+import os
+
+import uvicorn
+
+from app.settings import settings
+
+APP = "main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options(args: argparse.Namespace) -> dict:
+    """Keyword arguments for `uvicorn.run`, resolved from the parsed CLI."""
+    if args.dev:
+        return {"host": args.host, "port": args.port, "reload": True}
+
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": args.workers or os.cpu_count() or 1,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "backlog": args.backlog,
+        "timeout_keep_alive": args.keep_alive,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        # Recycle workers after this many requests; 0 keeps them forever
+        "limit_max_requests": args.max_requests or None,
+        # Per-request access lines are synchronous writes; /metrics covers traffic
+        "access_log": args.access_log,
+        "proxy_headers": True,
+        "server_header": False,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description=__doc__)
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument(
+        "--workers", type=int, default=settings.server_workers, help="0 means one per CPU (default)"
+    )
+    parser.add_argument("--backlog", type=int, default=settings.server_backlog)
+    parser.add_argument(
+        "--keep-alive", type=int, default=settings.server_keep_alive, help="seconds"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.server_graceful_timeout,
+        help="seconds to let in-flight requests finish on shutdown",
+    )
+    parser.add_argument("--max-requests", type=int, default=settings.server_max_requests)
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--dev", action="store_true", help="single process with auto-reload")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    options = uvicorn_options(parse_args(argv))
+    if not options.get("reload"):
+        print(
+            f"Starting {options['workers']} workers on {options['host']}:{options['port']}"
+            f" (loop={options['loop']}, http={options['http']})"
+        )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
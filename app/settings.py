@@ -0,0 +1,210 @@
+"""
+Typed application settings, loaded once per process.
+
+Every field can be overridden with an `APP_<FIELD>` environment variable
+(e.g. `APP_SMTP_POOL_SIZE=8`, `APP_RATE_LIMITS='{"login:ip": [60, 60]}'`) or
+from a JSON/TOML file named by `APP_SETTINGS_FILE`; the environment wins over
+the file, and both over the defaults below. Mapping fields (rate limits, role
+grants, log sample rates) are merged key by key, so the example above changes
+the `login:ip` budget and keeps all others.
+"""
+
+import json
+import os
+import tomllib
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+from types import UnionType
+from typing import Any, Literal, Union, get_args, get_origin
+
+from pydantic import BaseModel, ConfigDict, Field, SecretStr
+
+ENV_PREFIX = "APP_"
+
+
+class Settings(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=False)
+
+    # Tokens
+    secret_key: SecretStr = SecretStr("-5HSvdNr1f4574p16h7mxZl061nlshTEmQ8jjbdxlhI")
+    # "hmac" is the fast HS256 path; "eddsa" signs with Ed25519 and publishes a JWKS
+    token_backend: Literal["hmac", "jose", "eddsa"] = "hmac"
+    access_token_expire_minutes: int = Field(30, gt=0)
+    token_cache_size: int = Field(10_000, ge=0)  # verified tokens kept by get_current_user
+    # JSON keyring written by `python -m app.cognito.keys rotate`; None signs with secret_key
+    token_keyring_file: str | None = None
+    token_keys_retained: int = Field(2, ge=0)  # previous keys that still verify after a rotation
+    # Verifiers refetch /.well-known/jwks.json after this; keep it below the rotation interval
+    jwks_cache_control: str = "public, max-age=300, stale-while-revalidate=60"
+
+    # Users and passwords (scrypt); raising N rehashes users on their next login
+    user_store: str = "memory"  # or "sqlite:///path/to/users.db"
+    password_scrypt_n: int = 2**14
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+    password_hash_workers: int = Field(4, gt=0)
+    password_hash_executor: Literal["thread", "process"] = "thread"
+
+    # Page templates: one shared environment, compiled bytecode cached on disk
+    templates_dir: str = "templates"
+    templates_bytecode_cache_dir: str | None = ".cache/jinja"
+    templates_auto_reload: bool = False
+    login_page_cache_control: str = "public, max-age=0, must-revalidate"
+
+    # Mail
+    project_name: str = "FastAPI HTMX Login"
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025  # Mailcatcher
+    smtp_username: str | None = None
+    smtp_password: SecretStr | None = None
+    smtp_start_tls: bool = False
+    smtp_use_tls: bool = False
+    smtp_timeout: float = 10.0
+    smtp_pool_size: int = Field(2, gt=0)  # persistent connections per worker
+    emails_from_name: str = "Dev"
+    emails_from_email: str = "dev@local.test"
+    email_reset_token_expire_hours: int = 48
+    email_templates_auto_reload: bool = False
+    mail_queue_size: int = Field(1000, gt=0)  # queued messages before new ones are shed
+    mail_queue_workers: int = Field(2, gt=0)
+    mail_batch_size: int = Field(20, gt=0)  # messages sent per SMTP session
+    mail_queue_put_timeout: float = 1.0  # seconds to wait for room before shedding
+    # The mail stack is imported on the first send; True loads and compiles it at startup
+    warm_mail_on_startup: bool = False
+    # Bulk invites: recipients per SMTP session, sessions in flight, link lifetime
+    invite_batch_size: int = Field(100, gt=0)
+    invite_concurrency: int = Field(4, gt=0)
+    invite_token_expire_hours: int = Field(72, gt=0)
+
+    # Bearer token for /admin endpoints; they answer 404 while unset
+    admin_token: SecretStr | None = None
+
+    # Rate limits as (max hits, window seconds) per action and subject, sliding window
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, tuple[int, float]] = {
+        "login:ip": (30, 60),
+        "login:email": (10, 300),
+        "magic:ip": (10, 60),
+        "magic:email": (3, 300),
+        "forgot:ip": (10, 60),
+        "forgot:email": (3, 300),
+    }
+
+    # Failed-login lockout: from `threshold` failures on, backoff doubles per further failure
+    lockout_enabled: bool = True
+    lockout_threshold: int = Field(5, gt=0)
+    lockout_ip_factor: int = Field(4, gt=0)  # IPs get threshold * factor (shared NAT addresses)
+    lockout_base_seconds: float = 1.0
+    lockout_max_seconds: float = 900.0
+    lockout_half_life_seconds: float = 600.0  # failure counts halve without new failures
+    lockout_max_keys: int = Field(100_000, gt=0)  # per tracker, least recently failed evicted
+    # /forgot-password and /magic-login answer no sooner than this, whether the user exists,
+    # does not or the request was rate limited; keep it above the slowest lookup
+    enumeration_floor_seconds: float = Field(0.05, ge=0)
+
+    # Auth audit events: buffered in memory, written in batches by a background task
+    audit_enabled: bool = True
+    audit_store: str = "memory"  # or "file:///abs/path/audit.jsonl", "sqlite:///audit.db"
+    audit_buffer_size: int = Field(10_000, gt=0)  # oldest unwritten events dropped beyond this
+    audit_batch_size: int = Field(500, gt=0)  # events per write; a full batch flushes early
+    audit_flush_interval: float = Field(1.0, gt=0)  # seconds between writes
+
+    # Authorization: roles each role grants, defaults for users stored without one, and how
+    # long a worker trusts its cached copy of a user's tenant, role and token version
+    default_tenant: str = "default"
+    default_role: str = "user"
+    role_grants: dict[str, list[str]] = {"admin": ["admin", "user"], "user": ["user"]}
+    authz_cache_ttl_seconds: float = Field(60.0, ge=0)
+    authz_cache_size: int = Field(10_000, ge=0)
+
+    # Used magic-link/reset token ids, bucketed by expiry so they can be forgotten in bulk
+    used_token_bucket_seconds: int = Field(60, gt=0)
+    used_token_max_entries: int = Field(1_000_000, gt=0)
+
+    # Server-side sessions instead of JWT cookies
+    session_mode: bool = False
+    session_store: str = "memory"  # or "sqlite:///path/to/sessions.db"
+    session_ttl_minutes: int = Field(30, gt=0)
+    session_max_entries: int = Field(100_000, gt=0)
+    # Refresh the session/token cookie once less than this share of its lifetime is left
+    session_refresh_threshold: float = Field(0.25, ge=0, le=1)
+
+    metrics_enabled: bool = True
+
+    # Production server (python -m app.server); 0 workers means one per CPU
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = Field(0, ge=0)
+    server_backlog: int = 2048
+    server_keep_alive: int = 5  # seconds an idle connection stays open
+    server_graceful_timeout: int = 30  # seconds for in-flight requests on shutdown/restart
+    server_max_requests: int = 0  # recycle a worker after this many requests; 0 disables
+
+    # Logging goes through a queue to one writer thread; sampled events keep only that share
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_sample_rates: dict[str, float] = {"login_succeeded": 0.1}
+
+    @property
+    def smtp_options(self) -> dict[str, Any]:
+        """Extra aiosmtplib.SMTP arguments for TLS and auth."""
+        options: dict[str, Any] = {}
+        if self.smtp_start_tls:
+            options["start_tls"] = True
+        if self.smtp_use_tls:
+            options["use_tls"] = True
+        if self.smtp_username:
+            options["username"] = self.smtp_username
+        if self.smtp_password:
+            options["password"] = self.smtp_password.get_secret_value()
+        return options
+
+
+def _from_file(path: str) -> dict[str, Any]:
+    text = Path(path).read_text()
+    return tomllib.loads(text) if path.endswith(".toml") else json.loads(text)
+
+
+def _origins(annotation: Any) -> set[Any]:
+    if get_origin(annotation) in (Union, UnionType):
+        return {origin for arg in get_args(annotation) for origin in _origins(arg)}
+    return {get_origin(annotation) or annotation}
+
+
+def _from_env(environ: Mapping[str, str]) -> dict[str, Any]:
+    values: dict[str, Any] = {}
+    for name, field in Settings.model_fields.items():
+        raw = environ.get(ENV_PREFIX + name.upper())
+        if raw is None:
+            continue
+        # Structured values (rate limits, sample rates) come in as JSON; anything else,
+        # secrets included, is passed through as is
+        structured = _origins(field.annotation) & {dict, list, tuple}
+        values[name] = json.loads(raw) if structured else raw
+    return values
+
+
+def load_settings(environ: Mapping[str, str] | None = None) -> Settings:
+    environ = os.environ if environ is None else environ
+    layers = [_from_env(environ)]
+    if path := environ.get(ENV_PREFIX + "SETTINGS_FILE"):
+        layers.insert(0, _from_file(path))
+    values: dict[str, Any] = {}
+    for layer in layers:
+        for name, value in layer.items():
+            field = Settings.model_fields.get(name)
+            if field is not None and dict in _origins(field.annotation) and isinstance(value, dict):
+                # Override single keys of mappings, keep the other defaults
+                value = {**values.get(name, field.get_default(call_default_factory=True)), **value}
+            values[name] = value
+    return Settings.model_validate(values)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """The process-wide settings; parsed and validated on first call only."""
+    return load_settings()
+
+
+settings = get_settings()
@@ -0,0 +1,175 @@
+import gzip
+import hashlib
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, nodes
+from jinja2.ext import Extension
+
+from app.metrics import timer
+from app.settings import settings
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional, install the `brotli` extra
+    brotli = None
+
+
+class FragmentCacheExtension(Extension):
+    """
+    `{% cache "key" %}...{% endcache %}` renders the enclosed block once per
+    process and reuses the HTML afterwards. Only wrap markup that does not
+    depend on the render context. Disabled while templates auto-reload.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: Environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache={})
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache", [key]), [], [], body).set_lineno(lineno)
+
+    def _cache(self, key: str, caller) -> str:
+        if self.environment.auto_reload:
+            return caller()
+        cache = self.environment.fragment_cache
+        html = cache.get(key)
+        if html is None:
+            html = cache[key] = caller()
+        return html
+
+
+def create_environment() -> Environment:
+    bytecode_cache = None
+    if settings.templates_bytecode_cache_dir:
+        # Compiled templates survive restarts, so new workers start warm
+        Path(settings.templates_bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(settings.templates_bytecode_cache_dir)
+    return Environment(
+        loader=FileSystemLoader(settings.templates_dir),
+        autoescape=True,
+        auto_reload=settings.templates_auto_reload,
+        bytecode_cache=bytecode_cache,
+        cache_size=-1,
+        extensions=[FragmentCacheExtension],
+    )
+
+
+class Templates(Jinja2Templates):
+    def TemplateResponse(self, *args, **kwargs):
+        with timer("template_render"):
+            return super().TemplateResponse(*args, **kwargs)
+
+
+# Single environment shared by every router in the worker
+templates = Templates(env=create_environment())
+
+
+def load_templates() -> None:
+    """Compile every page template up front, e.g. at startup."""
+    for name in templates.env.list_templates(extensions=["html"]):
+        templates.env.get_template(name)
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        if name.strip() == coding:
+            try:
+                return float(params.strip().removeprefix("q=") or 1) > 0
+            except ValueError:
+                return True
+    return False
+
+
+class PrerenderedPage:
+    """
+    A template rendered once with a fixed context and kept as ready-to-send
+    bytes, including gzip (and brotli, if installed) bodies. Each encoding has
+    a strong ETag so conditional requests get a 304 without any rendering.
+    """
+
+    def __init__(self, name: str, context: dict | None = None, cache_control: str = "no-cache"):
+        self.name = name
+        self.context = context or {}
+        self.cache_control = cache_control
+        self._bodies: dict[str, tuple[bytes, str]] | None = None
+
+    def build(self) -> dict[str, tuple[bytes, str]]:
+        body = templates.env.get_template(self.name).render(self.context).encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body)
+        self._bodies = {coding: (data, f'"{digest}-{coding}"') for coding, data in bodies.items()}
+        return self._bodies
+
+    def response(self, request: Request) -> Response:
+        # Rebuilt per request only while templates auto-reload (dev)
+        bodies = self.build() if self._bodies is None or templates.env.auto_reload else self._bodies
+        headers = {"Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            for _, etag in bodies.values():
+                if etag in tags or "*" in tags:
+                    return Response(status_code=304, headers={**headers, "ETag": etag})
+
+        accept_encoding = request.headers.get("accept-encoding", "")
+        coding = next(
+            (c for c in ("br", "gzip") if c in bodies and _accepts(accept_encoding, c)), "identity"
+        )
+        body, etag = bodies[coding]
+        headers["ETag"] = etag
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(body, media_type="text/html", headers=headers)
+
+
+class StaticPartials:
+    """
+    Fixed HTMX fragments ("Invalid email or password.", the mail-sent notice)
+    rendered and encoded once, so serving one costs no template evaluation or
+    string building. Register them at import, build them at startup.
+    """
+
+    def __init__(self):
+        self._sources: dict[str, tuple[str | None, dict | str]] = {}
+        self._bodies: dict[str, bytes] = {}
+
+    def template(self, key: str, name: str, **context) -> str:
+        """Registers `name` rendered with a fixed `context` under `key`."""
+        self._sources[key] = (name, context)
+        return key
+
+    def html(self, key: str, html: str) -> str:
+        """Registers a literal HTML snippet under `key`."""
+        self._sources[key] = (None, html)
+        return key
+
+    def _build(self, key: str) -> bytes:
+        name, source = self._sources[key]
+        html = source if name is None else templates.env.get_template(name).render(source)
+        body = self._bodies[key] = html.encode()
+        return body
+
+    def build(self) -> None:
+        for key in self._sources:
+            self._build(key)
+
+    def response(self, key: str, headers: dict[str, str] | None = None) -> Response:
+        # Rebuilt per request only while templates auto-reload (dev)
+        body = self._bodies.get(key)
+        if body is None or templates.env.auto_reload:
+            body = self._build(key)
+        return Response(body, media_type="text/html", headers=headers)
+
+
+partials = StaticPartials()
@@ -0,0 +1,46 @@
+"""
+Renders/sec for email templates: read + compile per send vs. the cached registry.
+
+    uv run python -m benchmarks.bench_email_templates [iterations]
+"""
+
+import sys
+import time
+
+from jinja2 import Template
+
+from app.cognito.mails import EMAIL_TEMPLATES_DIR, load_email_templates, render_email_template
+
+CONTEXT = {
+    "project_name": "FastAPI HTMX Login",
+    "username": "test@example.com",
+    "email": "test@example.com",
+    "link": "http://localhost:8000/magic-link-verify?token=abc",
+    "valid_hours": 48,
+}
+
+
+def render_uncached(template_name: str) -> str:
+    return Template((EMAIL_TEMPLATES_DIR / template_name).read_text()).render(CONTEXT)
+
+
+def render_cached(template_name: str) -> str:
+    return render_email_template(template_name=template_name, context=CONTEXT)
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    load_email_templates()
+    print(f"{'template':<24} {'uncached/s':>12} {'cached/s':>12}")
+    for path in sorted(EMAIL_TEMPLATES_DIR.glob("*.html")):
+        rates = []
+        for render in (render_uncached, render_cached):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                render(path.name)
+            rates.append(iterations / (time.perf_counter() - start))
+        print(f"{path.name:<24} {rates[0]:>12,.0f} {rates[1]:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Load test for the auth endpoints, in-process through an ASGI transport or
+against a local uvicorn. Outgoing mail goes to a local aiosmtpd sink.
+
+    uv run python -m benchmarks.bench_endpoints                      # in-process
+    uv run python -m benchmarks.bench_endpoints --uvicorn            # spawn local uvicorn
+    uv run python -m benchmarks.bench_endpoints --save benchmarks/baseline.json
+    uv run python -m benchmarks.bench_endpoints --compare benchmarks/baseline.json
+
+Rate limits and login lockouts are switched off unless --rate-limit is given,
+since a load test from one client would otherwise only measure rejections.
+That covers the in-process app and --uvicorn; for --url start the server with
+APP_RATE_LIMIT_ENABLED=false APP_LOCKOUT_ENABLED=false yourself.
+
+With --compare the run exits non-zero when any endpoint's requests/sec drops,
+or its p99 grows, by more than --threshold (default 20%).
+
+A response only counts as a success when it is the one the scenario expects
+(status, redirect target or HX-Redirect, body text); rejections such as a
+302 back to `/`, a "Too many attempts" partial or `?error=invalid_token`
+count as errors.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import httpx
+
+from app.cognito import mails
+from app.cognito.lockout import lockouts
+from app.cognito.ratelimit import rate_limits
+from app.cognito.token import create_access_token
+from app.settings import settings
+from config import MAIL_SEND_MESSAGE
+
+EMAIL = "test@example.com"
+PASSWORD = "password123"
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    url: str
+    # Builds per-request kwargs for httpx; called before timing starts
+    make: Callable[[], dict] = field(default=lambda: {})
+    # Send the cookies of a fresh login, so the token carries the user's current version
+    login: bool = False
+    # What a successful response looks like
+    status: int = 200
+    headers: dict[str, str] = field(default_factory=dict)
+    text: str | None = None
+
+    def succeeded(self, resp: httpx.Response) -> bool:
+        return (
+            resp.status_code == self.status
+            and all(resp.headers.get(k) == v for k, v in self.headers.items())
+            and (self.text is None or self.text in resp.text)
+        )
+
+
+def _reset_form() -> dict:
+    token = create_access_token({"sub": EMAIL, "purpose": "password_reset"})
+    return {"data": {"token": token, "new_password": PASSWORD, "confirm_password": PASSWORD}}
+
+
+def _magic_params() -> dict:
+    token = create_access_token(
+        {"sub": EMAIL, "purpose": "magic_link"}, expires_delta=timedelta(minutes=5)
+    )
+    return {"params": {"token": token}}
+
+
+SCENARIOS = [
+    Scenario("GET /", "GET", "/"),
+    Scenario(
+        "POST /login",
+        "POST",
+        "/login",
+        lambda: {"data": {"username": EMAIL, "password": PASSWORD}},
+        headers={"hx-redirect": "/welcome"},
+    ),
+    Scenario(
+        "POST /magic-login",
+        "POST",
+        "/magic-login",
+        lambda: {"data": {"username": EMAIL}},
+        text=MAIL_SEND_MESSAGE,
+    ),
+    Scenario(
+        "GET /magic-link-verify",
+        "GET",
+        "/magic-link-verify",
+        _magic_params,
+        status=307,
+        headers={"location": "/welcome"},
+    ),
+    Scenario(
+        "POST /forgot-password",
+        "POST",
+        "/forgot-password",
+        lambda: {"data": {"email": EMAIL}},
+        text=MAIL_SEND_MESSAGE,
+    ),
+    Scenario(
+        "POST /reset-password",
+        "POST",
+        "/reset-password",
+        _reset_form,
+        text="Password updated successfully",
+    ),
+    # Last: the reset scenario above bumps the user's version, so log in again first
+    Scenario("GET /welcome", "GET", "/welcome", login=True, text=EMAIL),
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    # Cookies from earlier scenarios would carry stale tokens
+    client.cookies.clear()
+    if scenario.login:
+        resp = await client.post("/login", data={"username": EMAIL, "password": PASSWORD})
+        if resp.headers.get("hx-redirect") != "/welcome":
+            raise RuntimeError(f"login for {scenario.name} failed: {resp.text[:200]}")
+    prepared = [scenario.make() for _ in range(requests)]
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(jobs: list[dict]) -> None:
+        nonlocal errors
+        for kwargs in jobs:
+            start = time.perf_counter()
+            resp = await client.request(scenario.method, scenario.url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            errors += not scenario.succeeded(resp)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(prepared[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p90_ms": percentile(latencies, 90) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+    }
+
+
+async def run_all(base_url: str | None, requests: int, concurrency: int, only: list[str]) -> dict:
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    results = {}
+    async with client:
+        for scenario in SCENARIOS:
+            if only and not any(o in scenario.name for o in only):
+                continue
+            results[scenario.name] = await run_scenario(client, scenario, requests, concurrency)
+        if not base_url:
+            await mails.mail_queue.stop()
+            await mails.mail_pool.close()
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def smtp_sink():
+    """Accepts and discards mail on the configured SMTP port unless something already listens."""
+    from aiosmtpd.controller import Controller
+
+    class Sink:
+        async def handle_DATA(self, server, session, envelope):
+            return "250 OK"
+
+    with socket.socket() as sock:
+        in_use = sock.connect_ex((settings.smtp_host, settings.smtp_port)) == 0
+    if in_use:
+        yield
+        return
+    controller = Controller(Sink(), hostname=settings.smtp_host, port=settings.smtp_port)
+    controller.start()
+    try:
+        yield
+    finally:
+        controller.stop()
+
+
+@contextmanager
+def local_uvicorn(rate_limit: bool = False):
+    port = _free_port()
+    env = os.environ.copy()
+    if not rate_limit:
+        env.update(APP_RATE_LIMIT_ENABLED="false", APP_LOCKOUT_ENABLED="false")
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(url + "/", timeout=0.5)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {current['rps']:.0f} req/s vs baseline {base['rps']:.0f}")
+        if current["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']:.1f} ms vs baseline {base['p99_ms']:.1f}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--url", help="benchmark an already running server")
+    parser.add_argument("--uvicorn", action="store_true", help="spawn a local uvicorn to benchmark")
+    parser.add_argument("--only", nargs="*", default=[], help="substring filter on scenario names")
+    parser.add_argument("--save", help="write results as JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="keep rate limits and login lockouts on (in-process and --uvicorn runs)",
+    )
+    args = parser.parse_args()
+    # A load test from one client would only measure rejections otherwise
+    rate_limits.enabled = args.rate_limit
+    lockouts.enabled = args.rate_limit
+
+    with smtp_sink():
+        if args.uvicorn:
+            with local_uvicorn(args.rate_limit) as url:
+                results = asyncio.run(run_all(url, args.requests, args.concurrency, args.only))
+        else:
+            results = asyncio.run(run_all(args.url, args.requests, args.concurrency, args.only))
+
+    print(f"{'endpoint':<26} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, r in results.items():
+        print(
+            f"{name:<26} {r['rps']:>9,.0f} {r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['errors']:>7}"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Concurrent password verifies per executor, with p50/p99 latency.
+
+    uv run python -m benchmarks.bench_passwords [verifies]
+"""
+
+import asyncio
+import sys
+import time
+
+from app.cognito.passwords import PasswordHasher
+
+
+async def run(hasher: PasswordHasher, verifies: int) -> float:
+    stored = await hasher.hash("password123")
+    start = time.perf_counter()
+    await asyncio.gather(*(hasher.verify("password123", stored) for _ in range(verifies)))
+    return verifies / (time.perf_counter() - start)
+
+
+def main() -> None:
+    verifies = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{'executor':<8} {'verify/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind in ("thread", "process"):
+        hasher = PasswordHasher(executor=kind)
+        rate = asyncio.run(run(hasher, verifies))
+        stats = hasher.latency_stats()
+        hasher.shutdown()
+        print(f"{kind:<8} {rate:>10,.0f} {stats['p50'] * 1e3:>8.1f} {stats['p99'] * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Overhead of the rate limiter per check, local fast path vs. local + shared store.
+
+    uv run python -m benchmarks.bench_ratelimit [checks]
+"""
+
+import asyncio
+import sys
+import time
+
+from app.cognito.ratelimit import AuthRateLimits, MemorySharedStore
+
+BUDGETS = {"login:ip": (10**9, 60), "login:email": (10**9, 60)}
+
+
+async def run(limits: AuthRateLimits, checks: int) -> float:
+    start = time.perf_counter()
+    for n in range(checks):
+        await limits.check("login", ip=f"10.0.{n % 256}.{n % 97}", email=f"user{n % 5000}@x.com")
+    return (time.perf_counter() - start) / checks
+
+
+def main() -> None:
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{'mode':<16} {'us/check':>10} {'checks/s':>12}")
+    for name, limits in (
+        ("disabled", AuthRateLimits(BUDGETS, enabled=False)),
+        ("local", AuthRateLimits(BUDGETS)),
+        ("local+shared", AuthRateLimits(BUDGETS, shared=MemorySharedStore())),
+    ):
+        per_check = asyncio.run(run(limits, checks))
+        print(f"{name:<16} {per_check * 1e6:>10.2f} {1 / per_check:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
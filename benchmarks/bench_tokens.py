@@ -0,0 +1,42 @@
+"""
+Micro-benchmark for token issue/verify throughput per backend, relative to the
+HS256 fast path (`hmac`). `eddsa` shows what asymmetric Ed25519 signing costs.
+
+    uv run python -m benchmarks.bench_tokens [iterations]
+"""
+
+import sys
+import time
+
+from app.cognito.token import BACKENDS, make_engine
+
+
+def bench(backend: str, iterations: int) -> tuple[float, float]:
+    engine = make_engine(backend)
+    data = {"sub": "test@example.com"}
+
+    start = time.perf_counter()
+    tokens = [engine.issue(data) for _ in range(iterations)]
+    issue_rate = iterations / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for token in tokens:
+        engine.verify(token)
+    verify_rate = iterations / (time.perf_counter() - start)
+    return issue_rate, verify_rate
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    results = {name: bench(name, iterations) for name in BACKENDS}
+    base_issue, base_verify = results["hmac"]
+    print(f"{'backend':<8} {'issue/s':>12} {'verify/s':>12} {'issue x':>8} {'verify x':>9}")
+    for name, (issue_rate, verify_rate) in results.items():
+        print(
+            f"{name:<8} {issue_rate:>12,.0f} {verify_rate:>12,.0f}"
+            f" {issue_rate / base_issue:>8.2f} {verify_rate / base_verify:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
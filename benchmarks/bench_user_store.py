@@ -0,0 +1,50 @@
+"""
+Password-login lookups/sec against each user store, seeded with many users.
+
+    uv run python -m benchmarks.bench_user_store [users] [logins]
+"""
+
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.cognito.users import InMemoryUserRepository, SQLiteUserRepository
+
+CONCURRENCY = 64
+
+
+async def login_throughput(repo, emails: list[str]) -> float:
+    async def login(email: str) -> bool:
+        user = await repo.get_by_email(email)
+        return bool(user) and user["password"] == "password123"
+
+    start = time.perf_counter()
+    for offset in range(0, len(emails), CONCURRENCY):
+        await asyncio.gather(*(login(e) for e in emails[offset : offset + CONCURRENCY]))
+    return len(emails) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_logins = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    emails = [f"user{i}@example.com" for i in range(n_users)]
+    sample = random.choices(emails, k=n_logins)
+
+    memory = InMemoryUserRepository({e: {"password": "password123"} for e in emails})
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteUserRepository(str(Path(tmp) / "users.db"))
+        start = time.perf_counter()
+        sqlite.seed((e, "password123") for e in emails)
+        print(f"seeded {n_users:,} users into sqlite in {time.perf_counter() - start:.1f}s")
+
+        for name, repo in (("memory", memory), ("sqlite", sqlite)):
+            rate = asyncio.run(login_throughput(repo, sample))
+            print(f"{name:<8} {rate:>12,.0f} logins/s")
+        sqlite.close()
+
+
+if __name__ == "__main__":
+    main()
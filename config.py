@@ -1,7 +1,6 @@
-# SECRET_KEY = secrets.token_urlsafe(32)
-SECRET_KEY = "-5HSvdNr1f4574p16h7mxZl061nlshTEmQ8jjbdxlhI"
-
 # In-memory user store for simplicity
 USERS = {"test@example.com": {"password": "password123"}}
 
 MAIL_SEND_MESSAGE = "If an account exists for that address, a reset link has been sent."
+
+# Tunables (token backend, pools, caches, limits, SMTP, server) live in app.settings
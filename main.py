@@ -1,13 +1,53 @@
+import sys
+from contextlib import asynccontextmanager
+from typing import Annotated
+
 from fastapi import APIRouter, Depends, FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
+from app import metrics
 from app.cognito.api.main import login_router
-from app.cognito.utils import get_current_user
+from app.cognito.api.routes.login import login_page
+from app.cognito.audit import audit_log
+from app.cognito.authz import principals
+from app.cognito.middleware import CookieRefreshMiddleware
+from app.cognito.passwords import password_hasher
+from app.cognito.sessions import sessions
+from app.cognito.token import engine
+from app.cognito.users import user_repository
+from app.cognito.utils import require_role, token_cache
+from app.log import configure_logging, shutdown_logging
+from app.settings import settings
+from app.templating import load_templates, partials, templates
 
 router = APIRouter(tags=["login"])
 
-templates = Jinja2Templates(directory="templates")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    if settings.warm_mail_on_startup:
+        # Pay for the mail stack's imports and template compiles now, not on the first send
+        from app.cognito import mails, smtp
+
+        mails.load_email_templates()
+        smtp.client_module()
+    load_templates()
+    login_page.build()
+    partials.build()
+    # Fill the token backend's header/key caches before the first request
+    engine.verify(engine.issue({"sub": "warmup"}))
+    yield
+    if mails := sys.modules.get("app.cognito.mails"):
+        await mails.mail_queue.stop()
+        await mails.mail_pool.close()
+    for store in (user_repository, sessions.store):
+        if hasattr(store, "close"):
+            store.close()
+    await audit_log.stop()
+    password_hasher.shutdown()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="FastAPI HTMX Login",
@@ -15,24 +55,34 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+app.add_middleware(CookieRefreshMiddleware)
 app.include_router(login_router)
 
+if metrics.enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.registry.gauge("token_cache", token_cache.stats)
+    metrics.registry.gauge("principal_cache", principals.stats)
+    metrics.registry.gauge("audit_log", audit_log.stats)
+    metrics.registry.gauge("password_verify_seconds", password_hasher.latency_stats)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus text exposition of request and section timings."""
+        return metrics.registry.render()
+
 
 @app.get("/welcome", response_class=HTMLResponse)
-async def welcome_page(request: Request, user: str = Depends(get_current_user)):
+async def welcome_page(request: Request, user: Annotated[dict, Depends(require_role("user"))]):
     """Welcome page for authorized user"""
     content = {"request": request, "user": user["email"]}
     return templates.TemplateResponse("welcome.html", content)
 
 
 if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(
-        "main:app",  # points to 'app' in main.py
-        host="0.0.0.0",  # listen on all interfaces
-        port=8000,  # default port
-        reload=True,  # auto-reload for dev
-    )
+    # Dev server with auto-reload; production runs `python -m app.server`
+    from app.server import main
+
+    main(["--dev"])
@@ -1,7 +1,24 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ensure project root is importable so tests can import `main` and `app.*`
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    """
+    Each test starts with fresh rate-limit budgets, no login lockouts and no
+    cached principals.
+    """
+    from app.cognito.authz import principals
+    from app.cognito.lockout import lockouts
+    from app.cognito.ratelimit import rate_limits
+
+    rate_limits.reset()
+    lockouts.reset()
+    principals.clear()
@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.cognito.api.routes.login import htmx_message
+from app.cognito.passwords import verify_password
 from app.cognito.token import create_access_token, decode_token
 from config import USERS
 from main import app
@@ -16,9 +17,9 @@ def test_root_with_valid_reset_token_prefills_and_sets_hidden(client):
     token = create_access_token({"sub": "test@example.com", "purpose": "password_reset"})
     resp = client.get(f"/?reset_token={token}")
     assert resp.status_code == 200
-    # Reset token should be set in the hidden field
+    # Reset token is handed to the page script, which fills the hidden field
     assert 'id="reset-token"' in resp.text
-    assert f'value="{token}"' in resp.text
+    assert f'data-reset-token="{token}"' in resp.text
     # Password reset view should be shown
     assert 'id="view-password-reset"' in resp.text
 
@@ -99,7 +100,7 @@ def test_reset_password_post_invalid_token_shows_error(client):
 def test_reset_password_post_valid_token_updates_and_triggers_hx_header(client):
     # Ensure user exists and capture original password
     email = "test@example.com"
-    original = USERS[email]["password"]
+    original = dict(USERS[email])  # password and token version
     try:
         token = create_access_token({"sub": email, "purpose": "password_reset"})
         resp = client.post(
@@ -117,10 +118,11 @@ def test_reset_password_post_valid_token_updates_and_triggers_hx_header(client):
         assert "passwordResetSuccess" in hx_trigger
         assert email in hx_trigger
         assert "newpass123" in hx_trigger
-        # Password updated in USERS
-        assert USERS[email]["password"] == "newpass123"
+        # Password updated in USERS, stored as a hash
+        assert USERS[email]["password"] != "newpass123"
+        assert verify_password("newpass123", USERS[email]["password"])
     finally:
-        USERS[email]["password"] = original
+        USERS[email] = original
 
 
 def test_logout_deletes_cookie_and_redirects(client):
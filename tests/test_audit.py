@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cognito import audit
+from app.cognito.audit import (
+    AuditLog,
+    FileAuditSink,
+    MemoryAuditSink,
+    SQLiteAuditSink,
+    make_audit_sink,
+)
+from main import app
+
+# 2026-01-01T10:30Z
+T0 = 1767263400.0
+
+
+class RecordingSink(MemoryAuditSink):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def write(self, events):
+        self.batches.append(len(events))
+        super().write(events)
+
+
+@pytest.fixture
+def audit_sink(monkeypatch):
+    asyncio.run(audit.audit_log.flush())
+    sink = MemoryAuditSink()
+    monkeypatch.setattr(audit.audit_log, "sink", sink)
+    return sink
+
+
+def test_routes_record_auth_events(audit_sink):
+    client = TestClient(app)
+    client.post("/login", data={"username": "test@example.com", "password": "wrong"})
+    client.post("/login", data={"username": "test@example.com", "password": "password123"})
+    client.post("/magic-login", data={"username": "test@example.com"})
+    client.post("/logout", follow_redirects=False)
+    client.cookies.clear()
+    client.get("/welcome", follow_redirects=False)
+
+    asyncio.run(audit.audit_log.flush())
+    events = [(name, email) for _, name, email, _, _ in audit_sink.events]
+    assert events == [
+        ("login_failed", "test@example.com"),
+        ("login_succeeded", "test@example.com"),
+        ("magic_link_issued", "test@example.com"),
+        ("logout", "test@example.com"),
+        ("auth_rejected", None),
+    ]
+    assert audit_sink.events[-1][4] == {"reason": "no_token"}
+
+
+def test_events_are_written_in_batches_off_the_request_path():
+    sink = RecordingSink()
+    log = AuditLog(sink, batch_size=3, flush_interval=60)
+
+    async def scenario():
+        for i in range(2):
+            log.record("login_failed", f"u{i}@example.com", "10.0.0.1")
+        assert sink.batches == []  # nothing written while recording
+        log.record("login_failed", "u2@example.com", "10.0.0.1")
+        await asyncio.sleep(0.05)  # a full batch wakes the flusher early
+        assert sink.batches == [3]
+        for i in range(4):
+            log.record("login_failed", f"u{i}@example.com", "10.0.0.1")
+        await log.stop()
+
+    asyncio.run(scenario())
+    assert sink.batches == [3, 3, 1]
+    assert log.stats()["written"] == 7
+
+
+def test_full_buffer_drops_the_oldest_events():
+    sink = MemoryAuditSink()
+    log = AuditLog(sink, buffer_size=2)
+    for name in ("a", "b", "c"):
+        log.record(name)
+    asyncio.run(log.flush())
+    assert [event[1] for event in sink.events] == ["b", "c"]
+    assert log.stats()["dropped"] == 1
+
+
+@pytest.mark.parametrize("store", ["file", "sqlite"])
+def test_hourly_rollups(tmp_path, store, capsys):
+    path = tmp_path / f"audit.{store}"
+    sink = FileAuditSink(str(path)) if store == "file" else SQLiteAuditSink(str(path))
+    now = [T0]
+    log = AuditLog(sink, clock=lambda: now[0])
+    for ts, name, email, ip in [
+        (T0 - 3600, "login_failed", "a@example.com", "10.0.0.1"),
+        (T0, "login_failed", "a@example.com", "10.0.0.1"),
+        (T0, "login_failed", "b@example.com", "10.0.0.1"),
+        (T0, "login_failed", "b@example.com", "10.0.0.2"),
+        (T0, "magic_link_issued", "a@example.com", "10.0.0.3"),
+        (T0, "reset_link_issued", "a@example.com", "10.0.0.3"),
+    ]:
+        now[0] = ts
+        log.record(name, email, ip, reason="test")
+
+    failures = asyncio.run(log.rollup("login_failed", by="ip", until=T0 + 1))
+    assert failures == [
+        ("2026-01-01T09:00Z", "10.0.0.1", 1),
+        ("2026-01-01T10:00Z", "10.0.0.1", 2),
+        ("2026-01-01T10:00Z", "10.0.0.2", 1),
+    ]
+    links = asyncio.run(
+        log.rollup("magic_link_issued", "reset_link_issued", by="email", hours=1, until=T0 + 1)
+    )
+    assert links == [("2026-01-01T10:00Z", "a@example.com", 2)]
+    with pytest.raises(ValueError):
+        asyncio.run(log.rollup("login_failed", by="detail"))
+
+    url = f"file://{path}" if store == "file" else f"sqlite:///{path}"
+    audit.main(["login_failed", "--by", "email", "--hours", "1e9", "--store", url])
+    assert "2026-01-01T10:00Z\tb@example.com\t2" in capsys.readouterr().out
+
+
+def test_file_store_url_path_is_absolute(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sink = make_audit_sink(f"file://{tmp_path}/audit.jsonl")
+    assert sink.path == tmp_path / "audit.jsonl"
+    assert make_audit_sink("file:///audit.jsonl").path.is_absolute()
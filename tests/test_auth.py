@@ -32,7 +32,9 @@ def test_password_login_success_sets_cookie_and_hx_redirect(client):
     resp = client.post("/login", data={"username": "test@example.com", "password": "password123"})
     assert resp.status_code == 200
     # Cookie is set and HX-Redirect header points to /welcome
-    assert "access_token=" in resp.headers.get("set-cookie", "")
+    cookie = resp.headers.get("set-cookie", "")
+    assert "access_token=" in cookie
+    assert "HttpOnly" in cookie and "SameSite=lax" in cookie and "Max-Age=1800" in cookie
     assert resp.headers.get("HX-Redirect") == "/welcome"
 
 
@@ -59,7 +61,7 @@ def test_magic_login_returns_generic_message(client, monkeypatch):
 
 
 def test_magic_link_verify_sets_cookie_and_redirects(client):
-    token = create_access_token({"sub": "test@example.com"})
+    token = create_access_token({"sub": "test@example.com", "purpose": "magic_link"})
     resp = client.get(f"/magic-link-verify?token={token}", follow_redirects=False)
     assert resp.status_code in (302, 307)
     assert resp.headers.get("location") == "/welcome"
@@ -70,3 +72,13 @@ def test_magic_link_verify_invalid_token_redirects_with_error(client):
     resp = client.get("/magic-link-verify?token=not-a-valid-token", follow_redirects=False)
     assert resp.status_code in (302, 307)
     assert resp.headers.get("location") == "/?error=invalid_token"
+
+
+def test_magic_link_verify_rejects_other_token_purposes(client):
+    for claims in (
+        {"sub": "test@example.com"},
+        {"sub": "test@example.com", "purpose": "password_reset"},
+    ):
+        token = create_access_token(claims)
+        resp = client.get(f"/magic-link-verify?token={token}", follow_redirects=False)
+        assert resp.headers.get("location") == "/?error=invalid_token"
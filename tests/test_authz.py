@@ -0,0 +1,90 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.cognito.authz import PrincipalCache, principals
+from app.cognito.token import create_access_token
+from app.cognito.users import InMemoryUserRepository
+from app.cognito.utils import require_role
+from config import USERS
+from main import app
+
+CREDS = {"username": "test@example.com", "password": "password123"}
+
+
+class CountingRepository(InMemoryUserRepository):
+    lookups = 0
+
+    async def get_by_email(self, email):
+        self.lookups += 1
+        return await super().get_by_email(email)
+
+
+def test_access_token_carries_tenant_role_and_version():
+    client = TestClient(app)
+    client.post("/login", data=CREDS)
+    token = client.cookies["access_token"].strip('"').removeprefix("Bearer ")
+    claims = jwt.get_unverified_claims(token)
+    assert (claims["tenant"], claims["role"], claims["version"]) == ("default", "user", 0)
+
+
+def test_password_reset_invalidates_issued_tokens():
+    original = dict(USERS["test@example.com"])
+    client = TestClient(app)
+    client.post("/login", data=CREDS)
+    assert client.get("/welcome").status_code == 200
+    reset = create_access_token({"sub": "test@example.com", "purpose": "password_reset"})
+    form = {"token": reset, "new_password": "newpass123", "confirm_password": "newpass123"}
+    try:
+        client.post("/reset-password", data=form)
+        assert client.get("/welcome", follow_redirects=False).status_code == 302
+    finally:
+        USERS["test@example.com"] = original
+
+
+def test_token_for_another_tenant_is_rejected():
+    token = create_access_token({"sub": "test@example.com", "tenant": "other"})
+    client = TestClient(app)
+    client.cookies["access_token"] = f"Bearer {token}"
+    assert client.get("/welcome", follow_redirects=False).status_code == 302
+
+
+def test_require_role():
+    admin_app = FastAPI()
+
+    @admin_app.get("/admin-only")
+    async def admin_only(user: Annotated[dict, Depends(require_role("admin"))]):
+        return {"email": user["email"]}
+
+    USERS["root@example.com"] = {"password": "x", "role": "admin"}
+    try:
+        user_token = create_access_token({"sub": "test@example.com"})
+        admin_token = create_access_token({"sub": "root@example.com"})
+        client = TestClient(admin_app)
+        client.cookies["access_token"] = f"Bearer {user_token}"
+        assert client.get("/admin-only").status_code == 403
+        client.cookies["access_token"] = f"Bearer {admin_token}"
+        assert client.get("/admin-only").json() == {"email": "root@example.com"}
+    finally:
+        del USERS["root@example.com"]
+        principals.clear()
+
+
+def test_principal_cache_reads_through_once_per_ttl():
+    repo = CountingRepository({"a@example.com": {"password": "x", "role": "admin"}})
+    cache = PrincipalCache(repo, ttl=60)
+
+    async def scenario():
+        first = await cache.get("a@example.com")
+        assert first["roles"] == {"admin", "user"}
+        await cache.get("a@example.com")
+        assert repo.lookups == 1
+        cache.invalidate("a@example.com")
+        await cache.get("a@example.com")
+        assert repo.lookups == 2
+        assert await cache.get("missing@example.com") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,33 @@
+"""Cold-start guard: `import main` stays within a time budget and leaves rarely used stacks out."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# Cumulative `python -X importtime -c "import main"`, best of a few runs; override per machine
+BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "2000"))
+LAZY_MODULES = ("jose", "cryptography", "aiosmtplib", "app.cognito.mails", "app.cognito.invites")
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def _import_main_ms() -> float:
+    stderr = _python("-X", "importtime", "-c", "import main").stderr
+    line = next(line for line in reversed(stderr.splitlines()) if line.endswith("| main"))
+    return int(line.split("|")[1]) / 1000
+
+
+def test_import_main_within_budget():
+    best = min(_import_main_ms() for _ in range(3))
+    assert best < BUDGET_MS, f"import main took {best:.0f} ms (budget {BUDGET_MS:.0f} ms)"
+
+
+def test_rarely_used_modules_load_lazily():
+    code = f"import sys, main; print(*[m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    assert _python("-c", code).stdout.strip() == ""
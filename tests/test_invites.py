@@ -0,0 +1,135 @@
+import asyncio
+import email
+import email.policy
+import json
+import socket
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import SecretStr
+
+from app.cognito import invites
+from app.cognito.invites import InviteSender, iterate, parse_recipients
+from app.cognito.revocation import consume_token
+from app.cognito.smtp import SMTPPool
+from app.settings import settings
+from config import USERS
+from main import app
+
+controller_mod = pytest.importorskip("aiosmtpd.controller")
+
+
+class Sink:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture()
+def smtp_sink(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    sink = Sink()
+    controller = controller_mod.Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", port)
+    yield sink
+    controller.stop()
+
+
+@pytest.fixture(autouse=True)
+def invitees(monkeypatch):
+    """Invites only go to existing users."""
+    for address in ["ann@example.com", "bob@example.com", "a@example.com"] + [
+        f"user{i}@example.com" for i in range(7)
+    ]:
+        monkeypatch.setitem(USERS, address, {"password": "x"})
+
+
+async def _collect(aiterable):
+    return [item async for item in aiterable]
+
+
+def test_parses_csv_header_and_jsonl():
+    csv_lines = ["name,email", "Ann,ann@example.com", "", "Bob,bob@example.com"]
+    jsonl_lines = ['{"email": "ann@example.com"}', "not json"]
+    assert asyncio.run(_collect(parse_recipients(iterate(csv_lines)))) == [
+        "ann@example.com",
+        "bob@example.com",
+    ]
+    assert asyncio.run(_collect(parse_recipients(iterate(jsonl_lines), "jsonl"))) == [
+        "ann@example.com",
+        "not json",
+    ]
+
+
+def test_sends_in_batches_and_reports_each_recipient(smtp_sink):
+    emails = [f"user{i}@example.com" for i in range(7)] + ["broken", "stranger@example.com"]
+    sender = InviteSender("http://testserver/", batch_size=3, concurrency=2)
+    results = asyncio.run(_collect(sender.run(iterate(emails))))
+
+    statuses = {r["email"]: r["status"] for r in results if "email" in r}
+    assert statuses.pop("broken") == "invalid"
+    assert statuses.pop("stranger@example.com") == "unknown_user"
+    assert set(statuses.values()) == {"sent"} and len(statuses) == 7
+    assert results[-1]["summary"]["sent"] == 7
+    assert any("progress" in r for r in results)
+    assert len(smtp_sink.messages) == 7
+
+    # The link in the mail is a working, single-use magic link
+    message = email.message_from_bytes(smtp_sink.messages[0].content, policy=email.policy.default)
+    body = message.get_content()
+    token = body.split("magic-link-verify?token=")[1].split('"')[0].split("&")[0]
+    assert asyncio.run(consume_token(token, expected_purpose="magic_link"))[0] is True
+
+
+def test_invite_states_its_own_lifetime(monkeypatch):
+    monkeypatch.setattr(settings, "invite_token_expire_hours", 48)
+    message = InviteSender("http://testserver/")._message("user0@example.com")
+    body = message.get_content()
+    assert "expire in 48 hours" in body
+    assert "5 minutes" not in body and "request a magic link" not in body
+
+
+def test_failed_sends_are_reported(monkeypatch):
+    # Nothing listens on this port
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    pool = SMTPPool("127.0.0.1", port, size=1, timeout=1)
+    sender = InviteSender("http://testserver", batch_size=2, concurrency=1, pool=pool)
+    results = asyncio.run(_collect(sender.run(iterate(["a@example.com"]))))
+    assert results[0]["status"] == "failed"
+    assert results[-1]["summary"]["failed"] == 1
+
+
+def test_admin_endpoint_requires_token_and_streams_results(smtp_sink, monkeypatch):
+    client = TestClient(app)
+    upload = {
+        "content": b"email\r\nann@example.com\r\nbob@example.com\r\n",
+        "headers": {"Content-Type": "text/csv"},
+    }
+    assert client.post("/admin/invites", **upload).status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", SecretStr("s3cret-admin"))
+    assert client.post("/admin/invites", **upload).status_code == 401
+
+    upload["headers"]["Authorization"] = "Bearer s3cret-admin"
+    resp = client.post("/admin/invites", **upload)
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert lines[-1]["summary"]["sent"] == 2
+    assert len(smtp_sink.messages) == 2
+
+
+def test_cli_writes_ndjson(smtp_sink, tmp_path, capsys):
+    path = tmp_path / "people.jsonl"
+    path.write_text('{"email": "ann@example.com"}\n')
+    invites.main([str(path), "--base-url", "https://app.example.com"])
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert out[0] == {"email": "ann@example.com", "status": "sent"}
@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+from app.cognito.lockout import FailureTracker
+from app.cognito.passwords import password_hasher
+from main import app
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_backoff_doubles_past_the_threshold_and_caps():
+    clock = Clock()
+    tracker = FailureTracker(threshold=3, base_delay=2, max_delay=10, half_life=3600, clock=clock)
+    for _ in range(2):
+        tracker.fail("a@example.com")
+    assert tracker.retry_after("a@example.com") == 0
+
+    tracker.fail("a@example.com")
+    assert tracker.retry_after("a@example.com") == 2
+    tracker.fail("a@example.com")
+    assert tracker.retry_after("a@example.com") == 4
+    for _ in range(5):
+        tracker.fail("a@example.com")
+    assert tracker.retry_after("a@example.com") == 10
+
+    clock.now += 10
+    assert tracker.retry_after("a@example.com") == 0
+
+
+def test_failures_decay_and_memory_is_bounded():
+    clock = Clock()
+    tracker = FailureTracker(threshold=2, base_delay=60, half_life=100, max_keys=3, clock=clock)
+    tracker.fail("a")
+    tracker.fail("a")
+    assert tracker.retry_after("a") > 0
+    clock.now += 100  # two failures decay to one
+    assert tracker.retry_after("a") == 0
+
+    for key in ("b", "c", "d"):
+        tracker.fail(key)
+    assert len(tracker) == 3
+    tracker.fail("a")  # "a" was evicted, so this is its first failure again
+    assert tracker.retry_after("a") == 0
+
+
+def test_locked_account_is_rejected_before_password_work(monkeypatch):
+    client = TestClient(app)
+    creds = {"username": "test@example.com", "password": "wrong"}
+    for _ in range(5):
+        assert "Invalid email or password" in client.post("/login", data=creds).text
+
+    async def no_verify(*args):
+        raise AssertionError("password verified while locked")
+
+    monkeypatch.setattr(password_hasher, "verify", no_verify)
+    resp = client.post("/login", data={**creds, "password": "password123"})
+    assert "Too many attempts" in resp.text
+    assert int(resp.headers["Retry-After"]) >= 1
@@ -0,0 +1,45 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app.log import configure_logging, redact, shutdown_logging
+
+
+@pytest.fixture()
+def log_stream():
+    stream = io.StringIO()
+    configure_logging(level="INFO", json_output=True, sample_rates={"noisy": 0.0}, stream=stream)
+    yield stream
+    shutdown_logging()
+
+
+def _records(stream: io.StringIO) -> list[dict]:
+    shutdown_logging()  # flushes the listener
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_carry_extra_fields(log_stream):
+    logging.getLogger("app.test").info("email %s", "queued", extra={"to": "a@b.c"})
+    (record,) = _records(log_stream)
+    assert record["msg"] == "email queued"
+    assert record["to"] == "a@b.c"
+    assert record["level"] == "INFO"
+
+
+def test_tokens_are_redacted(log_stream):
+    link = "http://x/magic-link-verify?token=abc.def.ghi&next=/"
+    logging.getLogger("app.test").warning("link %s", link)
+    (record,) = _records(log_stream)
+    assert "abc.def.ghi" not in record["msg"]
+    assert "token=[redacted]&next=/" in record["msg"]
+    assert redact("Bearer eyJhbGciOi.eyJzdWIi.c2lnbmF0dXJl") == "Bearer [redacted]"
+
+
+def test_sampled_events_and_levels_are_filtered(log_stream):
+    logger = logging.getLogger("app.test")
+    logger.info("login succeeded", extra={"event": "noisy"})
+    logger.debug("below the level")
+    logger.info("kept")
+    assert [r["msg"] for r in _records(log_stream)] == ["kept"]
@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.cognito.mail_queue import MailQueue
+from app.cognito.mails import build_message
+
+
+class FakeClient:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def send_message(self, message):
+        if message["To"] in self.pool.refuse:
+            raise ConnectionResetError("server hung up")
+        self.pool.delivered.append(message["To"])
+
+
+class FakePool:
+    """Stands in for SMTPPool and records how many SMTP sessions were used."""
+
+    def __init__(self, refuse=()):
+        self.sessions = 0
+        self.delivered = []
+        self.refuse = set(refuse)
+
+    @asynccontextmanager
+    async def connection(self):
+        self.sessions += 1
+        yield FakeClient(self)
+
+    async def send(self, message):
+        async with self.connection() as client:
+            await client.send_message(message)
+
+
+def _message(n: int):
+    return build_message(email=f"user{n}@example.com", subject="s", html_content="x")
+
+
+def test_queue_sends_batches_over_one_session():
+    pool = FakePool()
+    queue = MailQueue(pool, workers=1, batch_size=10)
+
+    async def run():
+        for n in range(10):
+            await queue.put(_message(n))
+        await queue.drain()
+
+    asyncio.run(run())
+    assert len(pool.delivered) == 10
+    assert pool.sessions == 1
+    stats = queue.stats()
+    assert stats["sent"] == 10 and stats["failed"] == 0 and stats["depth"] == 0
+
+
+def test_queue_sheds_when_full():
+    queue = MailQueue(FakePool(), maxsize=2, workers=1)
+
+    async def run():
+        # Workers only get to run once we yield, so the third put finds the queue full
+        return [await queue.put(_message(n)) for n in range(3)]
+
+    assert asyncio.run(run()) == [True, True, False]
+    assert queue.stats()["dropped"] == 1
+
+
+def test_queue_counts_failures_and_keeps_sending():
+    pool = FakePool(refuse={"user1@example.com"})
+    queue = MailQueue(pool, workers=1, batch_size=10)
+
+    async def run():
+        for n in range(3):
+            await queue.put(_message(n))
+        await queue.drain()
+
+    asyncio.run(run())
+    assert pool.delivered == ["user0@example.com", "user2@example.com"]
+    stats = queue.stats()
+    assert stats["sent"] == 2 and stats["failed"] == 1
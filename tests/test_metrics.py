@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.cognito import mails  # noqa: F401  (registers the mail queue gauges on import)
+from main import app
+
+
+def test_metrics_exposes_request_and_section_timings():
+    client = TestClient(app)
+    client.get("/")
+    client.post("/login", data={"username": "test@example.com", "password": "password123"})
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in body
+    assert 'route="/login"' in body
+    assert 'app_section_seconds_count{section="token_encode"}' in body
+    assert "mail_queue_depth" in body
+    assert "token_cache_hits" in body
+
+
+def test_timer_is_noop_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", False)
+    with metrics.timer("disabled_section"):
+        pass
+    assert all(
+        labels != (("section", "disabled_section"),) for _, labels in metrics.registry.histograms
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    hist = registry.histogram("demo_seconds", op="x")
+    hist.observe(0.0002)
+    hist.observe(3.0)
+    text = registry.render()
+    assert 'demo_seconds_bucket{op="x",le="0.0005"} 1' in text
+    assert 'demo_seconds_bucket{op="x",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{op="x"} 2' in text
@@ -0,0 +1,55 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cognito.api.routes import login
+from app.settings import settings
+from app.templating import partials, templates
+from main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_partials_match_a_fresh_render(client):
+    body = client.post("/login", data={"username": "nobody@example.com", "password": "x"}).content
+    expected = templates.env.get_template("partials/error_message.html").render(
+        message="Invalid email or password."
+    )
+    assert body == expected.encode()
+
+    resp = partials.response(login.TOO_MANY_ATTEMPTS, headers={"Retry-After": "3"})
+    assert resp.headers["retry-after"] == "3"
+    assert resp.headers["content-type"].startswith("text/html")
+
+
+def test_partials_are_built_once(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(partials, "_build", lambda key: calls.append(key))
+    client.post(
+        "/reset-password", data={"token": "t", "new_password": "a", "confirm_password": "b"}
+    )
+    assert calls == []
+
+
+def _skip_send(*args):
+    pass
+
+
+@pytest.mark.parametrize("path", ["/forgot-password", "/magic-login"])
+def test_enumeration_endpoints_answer_alike_and_no_sooner_than_the_floor(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "enumeration_floor_seconds", 0.2)
+    mails = SimpleNamespace(send_password_reset_email=_skip_send, send_magic_link_email=_skip_send)
+    monkeypatch.setattr(login, "_mails", lambda: mails)
+    bodies = set()
+    for email in ("test@example.com", "nobody@example.com"):
+        start = time.perf_counter()
+        resp = client.post(path, data={"username": email})
+        assert time.perf_counter() - start >= 0.2
+        bodies.add(resp.content)
+    assert bodies == {login.htmx_snippet(login.MAIL_SEND_MESSAGE).encode()}
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cognito.passwords import PasswordHasher, verify_password
+from config import USERS
+from main import app
+
+
+def test_hash_and_verify_roundtrip():
+    hasher = PasswordHasher(n=2**10)
+    stored = asyncio.run(hasher.hash("s3cret"))
+    assert stored.startswith("scrypt$1024$8$1$")
+    assert asyncio.run(hasher.verify("s3cret", stored)) == (True, False)
+    assert asyncio.run(hasher.verify("wrong", stored)) == (False, False)
+    assert hasher.latency_stats()["count"] == 2
+
+
+def test_verify_flags_rehash_for_plaintext_and_old_params():
+    old = asyncio.run(PasswordHasher(n=2**10).hash("s3cret"))
+    hasher = PasswordHasher(n=2**11)
+    assert asyncio.run(hasher.verify("s3cret", "s3cret")) == (True, True)
+    assert asyncio.run(hasher.verify("s3cret", old)) == (True, True)
+    assert asyncio.run(hasher.verify("nope", None)) == (False, False)
+
+
+def test_process_pool_executor():
+    hasher = PasswordHasher(n=2**10, workers=1, executor="process")
+    try:
+        stored = asyncio.run(hasher.hash("s3cret"))
+        assert verify_password("s3cret", stored)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.fixture()
+def plaintext_user():
+    email = "plain@example.com"
+    USERS[email] = {"password": "password123"}
+    yield email
+    USERS.pop(email, None)
+
+
+def test_login_upgrades_plaintext_password(plaintext_user):
+    client = TestClient(app, follow_redirects=False)
+    resp = client.post("/login", data={"username": plaintext_user, "password": "password123"})
+    assert resp.headers.get("HX-Redirect") == "/welcome"
+    stored = USERS[plaintext_user]["password"]
+    assert stored.startswith("scrypt$") and verify_password("password123", stored)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cognito.ratelimit import (
+    MemorySharedStore,
+    RateLimiter,
+    ShardedCounterStore,
+    rate_limits,
+)
+from main import app
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _hits(limiter: RateLimiter, n: int, key: str = "k") -> list[float]:
+    return [asyncio.run(limiter.hit(key)) for _ in range(n)]
+
+
+def test_sliding_window_blocks_and_recovers():
+    clock = FakeClock(1000.0)  # start of a 10s window
+    limiter = RateLimiter("t", limit=3, period=10, clock=clock)
+    results = _hits(limiter, 4)
+    assert results[:3] == [0.0, 0.0, 0.0] and results[3] == pytest.approx(10.0)
+
+    # Halfway through the next window half of the previous window still counts
+    clock.now = 1015.0
+    assert _hits(limiter, 1) == [0.0]
+    clock.now = 1030.0
+    assert _hits(limiter, 3) == [0.0, 0.0, 0.0]
+
+
+def test_keys_are_independent():
+    limiter = RateLimiter("t", limit=1, period=60, clock=FakeClock())
+    assert _hits(limiter, 1, "a") == [0.0]
+    assert _hits(limiter, 1, "b") == [0.0]
+    assert _hits(limiter, 1, "a")[0] > 0
+
+
+def test_shared_store_combines_workers():
+    shared = MemorySharedStore()
+    clock = FakeClock()
+    # Two workers, each with its own local store, share one backend
+    workers = [RateLimiter("t", 3, 60, ShardedCounterStore(), shared, clock) for _ in range(2)]
+    results = [asyncio.run(workers[n % 2].hit("k")) for n in range(4)]
+    assert results[:3] == [0.0, 0.0, 0.0] and results[3] > 0
+
+
+def test_sharded_store_is_bounded():
+    store = ShardedCounterStore(shards=2, max_keys=4)
+    for n in range(100):
+        store.hit(f"key{n}", window=1)
+    assert sum(len(counters) for _, counters in store._shards) <= 4
+
+
+def test_login_is_rejected_before_password_check(monkeypatch):
+    client = TestClient(app)
+    calls = []
+    monkeypatch.setattr(
+        "app.cognito.api.routes.login.user_repository.get_by_email",
+        lambda email: calls.append(email),
+    )
+    monkeypatch.setitem(rate_limits.limiters, "login:email", RateLimiter("login:email", 0, 60))
+    resp = client.post("/login", data={"username": "a@example.com", "password": "x"})
+    assert "Too many attempts" in resp.text and resp.headers["retry-after"]
+    assert calls == []
+
+
+def test_magic_login_over_budget_answers_the_same(monkeypatch):
+    sent = []
+    monkeypatch.setattr("app.cognito.mails.send_magic_link_email", lambda *a: sent.append(a))
+    client = TestClient(app)
+    texts = {
+        client.post("/magic-login", data={"username": "test@example.com"}).text for _ in range(5)
+    }
+    assert len(texts) == 1
+    assert len(sent) == 3  # magic:email budget
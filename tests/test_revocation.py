@@ -0,0 +1,79 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.cognito.revocation import MemorySharedUsedTokenStore, UsedTokenIndex, UsedTokens
+from app.cognito.token import create_access_token, engine
+from config import USERS
+from main import app
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_tokens_carry_unique_jti():
+    first = engine.verify(create_access_token({"sub": "a@example.com"}))
+    second = engine.verify(create_access_token({"sub": "a@example.com"}))
+    assert first["jti"] and first["jti"] != second["jti"]
+
+
+def test_index_rejects_reuse_and_forgets_expired_buckets():
+    clock = FakeClock(1000.0)
+    index = UsedTokenIndex(bucket_seconds=60, clock=clock)
+    assert index.use("a", exp=1100) is True
+    assert index.use("a", exp=1100) is False
+    assert index.use("b", exp=1500) is True
+    assert len(index) == 2
+
+    clock.now = 1200.0  # "a" has expired, its bucket goes away
+    index.use("c", exp=1300)
+    assert len(index) == 2
+
+
+def test_index_stays_bounded():
+    index = UsedTokenIndex(bucket_seconds=1, max_entries=10, clock=FakeClock(0))
+    for n in range(100):
+        index.use(f"id{n}", exp=1000 + n)
+    assert len(index) <= 10
+
+
+def test_index_refuses_evicted_ids_instead_of_forgetting_them():
+    index = UsedTokenIndex(bucket_seconds=1, max_entries=10, clock=FakeClock(0))
+    for n in range(11):
+        assert index.use(f"id{n}", exp=1000 + n) is True
+    assert len(index) == 10
+    assert index.use("id0", exp=1000) is False  # its bucket was dropped to make room
+    assert index.use("new", exp=1000) is False  # unknown ids in that range too
+    assert index.use("new", exp=1100) is True
+
+
+def test_shared_store_catches_reuse_on_another_worker():
+    shared = MemorySharedUsedTokenStore()
+    workers = [UsedTokens(UsedTokenIndex(), shared) for _ in range(2)]
+    assert asyncio.run(workers[0].use("jti", exp=9e9)) is True
+    assert asyncio.run(workers[1].use("jti", exp=9e9)) is False
+
+
+def test_magic_link_can_only_be_used_once():
+    client = TestClient(app, follow_redirects=False)
+    token = create_access_token({"sub": "test@example.com", "purpose": "magic_link"})
+    assert client.get(f"/magic-link-verify?token={token}").headers["location"] == "/welcome"
+    resp = client.get(f"/magic-link-verify?token={token}")
+    assert resp.headers["location"] == "/?error=invalid_token"
+
+
+def test_reset_token_can_only_be_used_once():
+    client = TestClient(app)
+    original = dict(USERS["test@example.com"])  # password and token version
+    token = create_access_token({"sub": "test@example.com", "purpose": "password_reset"})
+    form = {"token": token, "new_password": "newpass123", "confirm_password": "newpass123"}
+    try:
+        assert "Password updated successfully" in client.post("/reset-password", data=form).text
+        assert "Invalid or expired reset token" in client.post("/reset-password", data=form).text
+    finally:
+        USERS["test@example.com"] = original
@@ -0,0 +1,35 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app import server
+from app.settings import settings
+from main import app
+
+
+def test_production_options_use_every_cpu_and_tuned_timeouts():
+    options = server.uvicorn_options(server.parse_args(["--keep-alive", "10", "--backlog", "512"]))
+    assert options["workers"] == (os.cpu_count() or 1)
+    assert options["timeout_keep_alive"] == 10
+    assert options["backlog"] == 512
+    assert options["timeout_graceful_shutdown"] == settings.server_graceful_timeout
+    assert "reload" not in options
+    assert options["loop"] in ("uvloop", "asyncio")
+    assert options["http"] in ("httptools", "h11")
+
+
+def test_dev_mode_is_a_single_reloading_process():
+    options = server.uvicorn_options(server.parse_args(["--dev", "--workers", "8"]))
+    assert options["reload"] is True
+    assert "workers" not in options
+
+
+def test_lifespan_warms_up_and_shuts_down_cleanly():
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
+    # Resources closed on shutdown come back lazily for the next run
+    with TestClient(app) as client:
+        resp = client.post(
+            "/login", data={"username": "test@example.com", "password": "password123"}
+        )
+        assert resp.headers.get("HX-Redirect") == "/welcome"
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cognito.sessions import Session, SQLiteSessionStore, sessions
+from app.cognito.token import create_access_token
+from app.settings import settings
+from config import USERS
+from main import app
+
+
+@pytest.fixture()
+def session_mode(monkeypatch):
+    monkeypatch.setattr(settings, "session_mode", True)
+
+
+def _login(client: TestClient) -> str:
+    resp = client.post("/login", data={"username": "test@example.com", "password": "password123"})
+    assert resp.headers.get("HX-Redirect") == "/welcome"
+    return resp.cookies["session_id"]
+
+
+def test_session_login_welcome_and_logout(session_mode):
+    client = TestClient(app, follow_redirects=False)
+    session_id = _login(client)
+    assert "test@example.com" in client.get("/welcome").text
+
+    client.post("/logout")
+    assert asyncio.run(sessions.get(session_id)) is None
+    # Replaying the old cookie after logout no longer works
+    client.cookies.set("session_id", session_id)
+    assert client.get("/welcome").status_code == 302
+
+
+def test_password_reset_ends_existing_sessions(session_mode):
+    original = dict(USERS["test@example.com"])
+    client = TestClient(app, follow_redirects=False)
+    session_id = _login(client)
+    assert client.get("/welcome").status_code == 200
+
+    reset = create_access_token({"sub": "test@example.com", "purpose": "password_reset"})
+    form = {"token": reset, "new_password": "newpass123", "confirm_password": "newpass123"}
+    try:
+        TestClient(app).post("/reset-password", data=form)
+        assert client.get("/welcome").status_code == 302
+        assert asyncio.run(sessions.get(session_id)) is None
+    finally:
+        USERS["test@example.com"] = original
+
+
+def test_session_near_expiry_is_extended(session_mode):
+    client = TestClient(app, follow_redirects=False)
+    session_id = _login(client)
+    session = asyncio.run(sessions.get(session_id))
+    session.expires_at = time.time() + 10
+
+    resp = client.get("/welcome")
+    assert resp.status_code == 200
+    assert "session_id=" in resp.headers.get("set-cookie", "")
+    assert session.expires_at > time.time() + sessions.ttl - 60
+
+
+def test_jwt_near_expiry_is_refreshed():
+    client = TestClient(app, follow_redirects=False)
+    token = create_access_token({"sub": "test@example.com"}, expires_delta=timedelta(minutes=2))
+    client.cookies.set("access_token", f"Bearer {token}")
+    resp = client.get("/welcome")
+    assert resp.status_code == 200
+    assert "access_token=" in resp.headers.get("set-cookie", "")
+
+    fresh = create_access_token({"sub": "test@example.com"})
+    client.cookies.set("access_token", f"Bearer {fresh}")
+    assert "set-cookie" not in client.get("/welcome").headers
+
+
+def test_sqlite_session_store(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), pool_size=1)
+    asyncio.run(store.save(Session("abc", "a@example.com", 1.0, time.time() + 60, version=2)))
+    loaded = asyncio.run(store.get("abc"))
+    assert (loaded.email, loaded.version) == ("a@example.com", 2)
+    asyncio.run(store.delete("abc"))
+    assert asyncio.run(store.get("abc")) is None
+    store.close()
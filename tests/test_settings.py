@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.settings import Settings, get_settings, load_settings
+
+
+def test_defaults_match_the_shipped_configuration():
+    settings = load_settings({})
+    assert settings == Settings()
+    assert settings.token_backend == "hmac"
+    assert settings.rate_limits["magic:email"] == (3, 300)
+
+
+def test_environment_overrides_file(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"smtp_pool_size": 4, "smtp_host": "mail.internal"}))
+    settings = load_settings(
+        {
+            "APP_SETTINGS_FILE": str(path),
+            "APP_SMTP_POOL_SIZE": "8",
+            "APP_SESSION_MODE": "true",
+            "APP_RATE_LIMITS": '{"login:ip": [60, 30]}',
+        }
+    )
+    assert settings.smtp_pool_size == 8
+    assert settings.smtp_host == "mail.internal"
+    assert settings.session_mode is True
+    assert settings.rate_limits["login:ip"] == (60, 30.0)
+    assert settings.rate_limits["magic:email"] == (3, 300)  # merged over the defaults
+
+
+def test_only_structured_fields_are_json_decoded():
+    settings = load_settings({"APP_SECRET_KEY": "{secret", "APP_ADMIN_TOKEN": "[token"})
+    assert settings.secret_key.get_secret_value() == "{secret"
+    assert settings.admin_token.get_secret_value() == "[token"
+
+
+def test_toml_file_and_smtp_options(tmp_path):
+    path = tmp_path / "settings.toml"
+    path.write_text('smtp_start_tls = true\nsmtp_username = "mailer"\nsmtp_password = "pw"\n')
+    settings = load_settings({"APP_SETTINGS_FILE": str(path)})
+    assert settings.smtp_options == {"start_tls": True, "username": "mailer", "password": "pw"}
+    assert "pw" not in repr(settings)
+
+
+def test_invalid_values_fail_at_load():
+    with pytest.raises(ValidationError):
+        load_settings({"APP_SMTP_POOL_SIZE": "0"})
+    with pytest.raises(ValidationError):
+        load_settings({"APP_TOKEN_BACKEND": "rsa"})
+
+
+def test_settings_are_loaded_once():
+    assert get_settings() is get_settings()
@@ -0,0 +1,74 @@
+import asyncio
+import socket
+
+import pytest
+
+from app.cognito.mails import build_message
+from app.cognito.smtp import SMTPPool
+
+controller_mod = pytest.importorskip("aiosmtpd.controller")
+
+
+class SinkHandler:
+    """Collects delivered messages and counts SMTP sessions."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture()
+def smtp_sink():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = SinkHandler()
+    controller = controller_mod.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def _message(n: int):
+    return build_message(
+        email=f"user{n}@example.com", subject=f"mail {n}", html_content="<p>hi</p>"
+    )
+
+
+def test_pool_reuses_persistent_connection(smtp_sink):
+    handler, port = smtp_sink
+    pool = SMTPPool("127.0.0.1", port, size=1)
+
+    async def run():
+        for n in range(3):
+            await pool.send(_message(n))
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(handler.messages) == 3
+    assert pool.connects == 1
+    assert handler.messages[0].rcpt_tos == ["user0@example.com"]
+
+
+def test_pool_reconnects_after_dropped_connection(smtp_sink):
+    handler, port = smtp_sink
+    pool = SMTPPool("127.0.0.1", port, size=1)
+
+    async def run():
+        await pool.send(_message(1))
+        pool._idle[0].close()  # simulate the server hanging up between sends
+        await pool.send(_message(2))
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(handler.messages) == 2
+    assert pool.connects == 2
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+from jinja2 import DictLoader, Environment
+
+from app.templating import FragmentCacheExtension, templates
+from main import app
+
+
+def _env(auto_reload: bool) -> Environment:
+    loader = DictLoader({"page.html": '{% cache "k" %}{{ x }}{% endcache %}|{{ x }}'})
+    return Environment(loader=loader, auto_reload=auto_reload, extensions=[FragmentCacheExtension])
+
+
+def test_fragment_is_rendered_once():
+    env = _env(auto_reload=False)
+    assert env.get_template("page.html").render(x=1) == "1|1"
+    assert env.get_template("page.html").render(x=2) == "1|2"
+
+
+def test_fragment_cache_is_bypassed_while_auto_reloading():
+    env = _env(auto_reload=True)
+    assert env.get_template("page.html").render(x=1) == "1|1"
+    assert env.get_template("page.html").render(x=2) == "2|2"
+
+
+def test_login_page_fragments_keep_dynamic_parts():
+    page = templates.env.get_template("login.html")
+    first = page.render(error=None, reset_token="tok-1", reset_email=None)
+    second = page.render(error="Boom", reset_token="tok-2", reset_email=None)
+    assert 'data-reset-token="tok-1"' in first and 'data-reset-token="tok-2"' in second
+    assert first.count("tok-1") == 1 and "tok-1" not in second
+    assert "Boom" in second and "Boom" not in first
+    assert "login:forms" in templates.env.fragment_cache
+
+
+def test_anonymous_login_page_is_prerendered_with_etag():
+    client = TestClient(app)
+    resp = client.get("/", headers={"accept-encoding": "identity"})
+    etag = resp.headers["etag"]
+    assert resp.status_code == 200 and "Log in with Password" in resp.text
+    assert "content-encoding" not in resp.headers
+    assert resp.headers["cache-control"]
+
+    gz = client.get("/", headers={"accept-encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip" and gz.headers["etag"] != etag
+    assert gz.text == resp.text
+
+    cached = client.get("/", headers={"if-none-match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+
+def test_login_page_error_variant_renders_dynamically():
+    resp = TestClient(app).get("/?error=invalid_token")
+    assert "etag" not in resp.headers
+    assert "invalid or has expired" in resp.text
@@ -0,0 +1,130 @@
+import base64
+import string
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.cognito import keys
+from app.cognito.api.routes import jwks as jwks_route
+from app.cognito.keys import Keyring
+from app.cognito.token import EdDSABackend, InvalidTokenError, TokenEngine, make_engine
+from main import app
+
+
+@pytest.mark.parametrize(("signer", "verifier"), [("jose", "hmac"), ("hmac", "jose")])
+def test_backends_are_interchangeable(signer, verifier):
+    token = make_engine(signer).issue({"sub": "a@example.com", "purpose": "password_reset"})
+    claims = make_engine(verifier).verify(token, expected_purpose="password_reset")
+    assert claims["sub"] == "a@example.com"
+    assert claims["exp"] > time.time()
+
+
+@pytest.mark.parametrize("backend", ["jose", "hmac", "eddsa"])
+def test_rejects_tampered_expired_and_foreign_tokens(backend):
+    engine = make_engine(backend)
+    token = engine.issue({"sub": "a@example.com"})
+    header, payload, signature = token.split(".")
+
+    with pytest.raises(InvalidTokenError):
+        engine.verify(f"{header}.{payload}.{signature[::-1]}")
+    with pytest.raises(InvalidTokenError):
+        engine.verify(engine.issue({"sub": "a@example.com"}, timedelta(seconds=-10)))
+    with pytest.raises(InvalidTokenError):
+        make_engine(backend, secret="other-secret").verify(token)
+    with pytest.raises(InvalidTokenError):
+        engine.verify("not-a-token")
+
+
+@pytest.mark.parametrize("backend", ["hmac", "eddsa"])
+def test_signature_has_a_single_accepted_spelling(backend):
+    engine = make_engine(backend)
+    token = engine.issue({"sub": "a@example.com"})
+    # The lowest bit of the last character is unused, so this decodes to the same bytes
+    alphabet = string.ascii_uppercase + string.ascii_lowercase + string.digits + "-_"
+    sibling = token[:-1] + alphabet[alphabet.index(token[-1]) ^ 1]
+    pad = "=" * (-len(token.split(".")[2]) % 4)
+    assert base64.urlsafe_b64decode(sibling.split(".")[2] + pad) == base64.urlsafe_b64decode(
+        token.split(".")[2] + pad
+    )
+    for variant in (sibling, token + "=", token + "A"):
+        with pytest.raises(InvalidTokenError):
+            engine.verify(variant)
+
+
+def test_hmac_backend_rejects_alg_none():
+    engine = make_engine("hmac")
+    # {"alg":"none","typ":"JWT"} + {"sub":"a@example.com"} with an empty signature
+    token = "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0.eyJzdWIiOiJhQGV4YW1wbGUuY29tIn0."
+    with pytest.raises(InvalidTokenError):
+        engine.verify(token)
+
+
+@pytest.mark.parametrize("backend", ["jose", "hmac"])
+def test_rotation_keeps_recent_keys_verifying(backend):
+    ring = Keyring.single("first-secret")
+    old_token = make_engine(backend, keyring=ring).issue({"sub": "a@example.com"})
+
+    rotated = ring.rotate(keep=1)
+    engine = make_engine(backend, keyring=rotated)
+    token = engine.issue({"sub": "a@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] == rotated.active
+    assert engine.verify(old_token)["sub"] == "a@example.com"
+
+    # Two rotations later the first key is gone
+    with pytest.raises(InvalidTokenError):
+        make_engine(backend, keyring=rotated.rotate(keep=1)).verify(old_token)
+
+
+def test_unknown_kid_is_rejected():
+    token = make_engine("hmac", keyring=Keyring({"k1": "s1"}, "k1")).issue({"sub": "a@b.c"})
+    with pytest.raises(InvalidTokenError):
+        make_engine("hmac", keyring=Keyring({"k2": "s1"}, "k2")).verify(token)
+
+
+def test_rotate_cli_writes_a_private_keyring(tmp_path, capsys):
+    path = tmp_path / "keys.json"
+    keys.main(["rotate", "--file", str(path), "--keep", "1"])
+    keys.main(["rotate", "--file", str(path), "--keep", "1"])
+    ring = keys.load_keyring(str(path))
+    assert len(ring.keys) == 2
+    assert keys.LEGACY_KID not in ring.keys
+    assert path.stat().st_mode & 0o077 == 0
+    assert f"{ring.active} (active)" in capsys.readouterr().out
+
+
+def test_eddsa_tokens_verify_from_published_jwks():
+    ring = Keyring.single("signing-seed").rotate(keep=1)
+    signer = make_engine("eddsa", keyring=ring)
+    token = signer.issue({"sub": "a@example.com"})
+    assert jwt.get_unverified_header(token) == {"alg": "EdDSA", "kid": ring.active, "typ": "JWT"}
+
+    jwks = signer.backend.jwks()
+    assert [k["kid"] for k in jwks["keys"]] == list(ring.keys)
+    gateway = TokenEngine(EdDSABackend.from_jwks(jwks))
+    assert gateway.verify(token)["sub"] == "a@example.com"
+    with pytest.raises(InvalidTokenError):
+        gateway.issue({"sub": "a@example.com"})
+
+    # Neither an HS256 token nor a tampered signature gets through
+    with pytest.raises(InvalidTokenError):
+        gateway.verify(make_engine("hmac", keyring=ring).issue({"sub": "a@example.com"}))
+    header, payload, signature = token.split(".")
+    with pytest.raises(InvalidTokenError):
+        gateway.verify(f"{header}.{payload}.{signature[::-1]}")
+
+
+def test_jwks_endpoint_is_cacheable(monkeypatch):
+    monkeypatch.setattr(jwks_route, "engine", make_engine("eddsa"))
+    monkeypatch.setattr(jwks_route, "_document", None)
+    client = TestClient(app)
+
+    resp = client.get("/.well-known/jwks.json")
+    assert resp.headers["content-type"] == "application/jwk-set+json"
+    assert "max-age" in resp.headers["cache-control"]
+    assert resp.json()["keys"][0]["crv"] == "Ed25519"
+
+    cached = client.get("/.well-known/jwks.json", headers={"If-None-Match": resp.headers["etag"]})
+    assert cached.status_code == 304
@@ -1,9 +1,11 @@
+import asyncio
 from types import SimpleNamespace
 
 import pytest
 
 from app.cognito import mails as mails_mod
 from app.cognito import utils as utils_mod
+from app.cognito.cache import TTLCache
 from app.cognito.token import create_access_token, decode_token
 
 
@@ -21,21 +23,21 @@ def test_token_decode_missing_sub_returns_false():
 def test_get_current_user_no_cookie_raises_redirect():
     req = SimpleNamespace(cookies={})
     with pytest.raises(Exception) as exc:
-        utils_mod.get_current_user(req)
+        asyncio.run(utils_mod.get_current_user(req))
     assert hasattr(exc.value, "headers") and exc.value.headers.get("Location") == "/"
 
 
 def test_get_current_user_invalid_token_redirects():
     req = SimpleNamespace(cookies={"access_token": "Bearer not-a-token"})
     with pytest.raises(Exception) as exc:
-        utils_mod.get_current_user(req)
+        asyncio.run(utils_mod.get_current_user(req))
     assert exc.value.headers.get("Location") == "/"
 
 
 def test_get_current_user_valid_token_returns_user():
     token = create_access_token({"sub": "test@example.com"})
     req = SimpleNamespace(cookies={"access_token": f"Bearer {token}"})
-    user = utils_mod.get_current_user(req)
+    user = asyncio.run(utils_mod.get_current_user(req))
     assert user["email"] == "test@example.com"
 
 
@@ -44,43 +46,69 @@ def test_get_current_user_token_without_sub_redirects():
     token = create_access_token({})
     req = SimpleNamespace(cookies={"access_token": f"Bearer {token}"})
     with pytest.raises(Exception) as exc:
-        utils_mod.get_current_user(req)
+        asyncio.run(utils_mod.get_current_user(req))
     assert exc.value.headers.get("Location") == "/"
 
 
 def test_mails_send_magic_and_reset_email(monkeypatch):
     sent = []
 
-    class DummyMessage:
-        def __init__(self, subject, html, mail_from):  # noqa: D401
-            self.subject = subject
-            self.html = html
-            self.mail_from = mail_from
-
-        def send(self, to, smtp):
+    class DummyQueue:
+        async def put(self, message):
             sent.append(
                 {
-                    "to": to,
-                    "subject": self.subject,
-                    "html": self.html,
-                    "smtp": smtp,
+                    "to": message["To"],
+                    "subject": message["Subject"],
+                    "html": message.get_content(),
                 }
             )
-            return "ok"
+            return True
 
-    # Patch emails.Message used inside mails module
-    monkeypatch.setattr(mails_mod, "emails", SimpleNamespace(Message=DummyMessage))
+    # Replace the outbound mail queue used inside mails module
+    monkeypatch.setattr(mails_mod, "mail_queue", DummyQueue())
 
     # Fake request with just what mails accesses
     fake_request = SimpleNamespace(base_url=SimpleNamespace(scheme="http", netloc="test.local"))
 
-    mails_mod.send_magic_link_email("user@example.com", fake_request)
-    mails_mod.send_password_reset_email("user@example.com", fake_request)
+    asyncio.run(mails_mod.send_magic_link_email("user@example.com", fake_request))
+    asyncio.run(mails_mod.send_password_reset_email("user@example.com", fake_request))
 
     assert len(sent) == 2
+    assert all(s["to"] == "user@example.com" for s in sent)
     subj = {s["subject"] for s in sent}
     assert any("Magic link" in s for s in subj)
     assert any("Reset password" in s for s in subj)
     # HTML should contain the constructed link placeholder
     assert any("/magic-link-verify?token=" in s["html"] for s in sent)
     assert any("/reset-password?token=" in s["html"] for s in sent)
+
+
+def test_get_current_user_caches_verified_token():
+    utils_mod.token_cache.clear()
+    token = create_access_token({"sub": "test@example.com"})
+    req = SimpleNamespace(cookies={"access_token": f"Bearer {token}"})
+    assert asyncio.run(utils_mod.get_current_user(req))["email"] == "test@example.com"
+    assert asyncio.run(utils_mod.get_current_user(req))["email"] == "test@example.com"
+    stats = utils_mod.token_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["size"] == 1
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, expires_at=100)
+    cache.set("b", 2, expires_at=200)
+    assert cache.get("a", now=50) == 1
+    cache.set("c", 3, expires_at=300)  # evicts "b", the least recently used
+    assert cache.get("b", now=50) is None
+    assert cache.get("a", now=150) is None  # expired
+    assert cache.get("c", now=150) == 3
+
+
+def test_email_templates_are_compiled_once():
+    mails_mod.load_email_templates()
+    first = mails_mod.email_templates.get_template("magic_link_email.html")
+    assert mails_mod.email_templates.get_template("magic_link_email.html") is first
+    html = mails_mod.render_email_template(
+        template_name="magic_link_email.html", context={"link": "http://x/magic"}
+    )
+    assert "http://x/magic" in html
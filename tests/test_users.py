@@ -0,0 +1,71 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.cognito.users import InMemoryUserRepository, SQLiteUserRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryUserRepository({"a@example.com": {"password": "secret"}})
+        return
+    repo = SQLiteUserRepository(str(tmp_path / "users.db"), pool_size=2)
+    repo.seed([("a@example.com", "secret")])
+    yield repo
+    repo.close()
+
+
+def test_get_by_email(repo):
+    user = asyncio.run(repo.get_by_email("a@example.com"))
+    assert user == {
+        "email": "a@example.com",
+        "password": "secret",
+        "tenant": "default",
+        "role": "user",
+        "version": 0,
+    }
+    assert asyncio.run(repo.get_by_email("missing@example.com")) is None
+
+
+def test_update_password(repo):
+    assert asyncio.run(repo.update_password("a@example.com", "changed")) is True
+    assert asyncio.run(repo.get_by_email("a@example.com"))["password"] == "changed"
+    assert asyncio.run(repo.update_password("missing@example.com", "x")) is False
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "users.db")
+    repo = SQLiteUserRepository(path)
+    repo.seed([("a@example.com", "secret")])
+    asyncio.run(repo.update_password("a@example.com", "changed"))
+    repo.close()
+
+    reopened = SQLiteUserRepository(path)
+    reopened.seed([("a@example.com", "secret")])  # existing users are kept
+    assert asyncio.run(reopened.get_by_email("a@example.com"))["password"] == "changed"
+    reopened.close()
+
+
+def test_invalidate_tokens_bumps_version(repo):
+    asyncio.run(repo.update_password("a@example.com", "rehashed"))
+    assert asyncio.run(repo.get_by_email("a@example.com"))["version"] == 0
+    asyncio.run(repo.update_password("a@example.com", "reset", invalidate_tokens=True))
+    assert asyncio.run(repo.get_by_email("a@example.com"))["version"] == 1
+
+
+def test_sqlite_store_adds_role_columns_to_old_databases(tmp_path):
+    path = str(tmp_path / "users.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (email TEXT PRIMARY KEY, password TEXT NOT NULL)")
+    conn.execute("INSERT INTO users VALUES ('a@example.com', 'secret')")
+    conn.commit()
+    conn.close()
+
+    repo = SQLiteUserRepository(path)
+    repo.seed([("b@example.com", "secret", "acme", "admin")])
+    assert asyncio.run(repo.get_by_email("a@example.com"))["role"] == "user"
+    b = asyncio.run(repo.get_by_email("b@example.com"))
+    assert (b["tenant"], b["role"], b["version"]) == ("acme", "admin", 0)
+    repo.close()